@@ -1,16 +1,20 @@
+from dataclasses import fields
+
 import configargparse
-from odat.run_analyzer import run_parallel_analyzer
-from odat.options import Options
+
+DEFAULT_CONFIG_FILES = [
+    "./*.ini",
+    "./configs/*.ini",
+    "~/.config/odat.ini",
+]
 
 
 def parse_cli_args():
-    p = configargparse.ArgParser(
-        default_config_files=[
-            "./*.ini",
-            "./configs/*.ini",
-            "~/.config/odat.ini",
-        ]
-    )
+    return build_cli_parser().parse_args()
+
+
+def build_cli_parser():
+    p = configargparse.ArgParser(default_config_files=DEFAULT_CONFIG_FILES)
     p.add(
         "-c",
         "--config",
@@ -85,24 +89,23 @@ def parse_cli_args():
         action="store_true",
     )
 
-    return p.parse_args()
+    return p
 
 def main():
     _opt = parse_cli_args()
+
+    # deferred until the arguments have been parsed, so that --help and argument errors don't pay for
+    # importing shapely, rich, pydantic and the map database stack
+    from odat.options import Options
+    from odat.run_analyzer import run_parallel_analyzer
+
+    # options that were not given anywhere are left out, so that the Options defaults apply
     options = Options(
-        db=_opt.db,
-        input=_opt.input,
-        lines_table=_opt.lines_table,
-        nodes_table=_opt.nodes_table,
-        decoder_config=_opt.decoder_config,
-        mod_spatialite=_opt.mod_spatialite,
-        output_dir=_opt.output_dir,
-        target_crs=_opt.target_crs,
-        concave_ratio=_opt.concave_ratio,
-        buffer=_opt.buffer,
-        lrp_radius=_opt.lrp_radius,
-        num_threads=_opt.num_threads,
-        verbose=_opt.verbose,
+        **{
+            f.name: getattr(_opt, f.name)
+            for f in fields(Options)
+            if getattr(_opt, f.name, None) is not None
+        }
     )
 
     run_parallel_analyzer(options)
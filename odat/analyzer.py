@@ -1,8 +1,12 @@
 import logging
-from typing import Tuple, Optional, List, cast
+from collections import OrderedDict, deque
+from functools import lru_cache
+from typing import Tuple, Optional, List, Sequence, cast
 
 import geoutils
-from geoutils import buffer_wgs84_geometry, split_line, GeoCoordinates
+import numpy as np
+import shapely
+from geoutils import buffer_wgs84_geometry, GeoCoordinates
 from openlr import LineLocationReference, LocationReferencePoint, binary_decode
 from openlr_dereferencer.decoding.candidate import Candidate
 from openlr_dereferencer.decoding.candidate_functions import make_candidates
@@ -11,6 +15,7 @@ from pyproj.exceptions import GeodError
 from shapely import LineString, Point, Polygon, intersection
 from webtool.map_databases.tomtom_sqlite import TomTomMapReaderSQLite
 
+from . import geometry
 from .analysis_result import AnalysisResult
 from .buffer_reader import BufferReader
 from .decoder_configs import (
@@ -25,7 +30,69 @@ from .match_result import MatchResult
 from .odat_observer import CandidateCollector, ScoreCollector
 
 
+@lru_cache(maxsize=100_000)
+def _cached_binary_decode(binstr: str):
+    """
+    binary_decode() memoized on the OpenLR string, since feeds repeat the same codes across polling cycles.  The
+    returned location reference is shared between callers and must not be modified.
+    """
+    return binary_decode(binstr)
+
+
+def _locref_key(locref: LineLocationReference) -> tuple:
+    """Hashable key identifying a LineLocationReference, whose list of points makes it unhashable itself"""
+    return tuple(locref.points), locref.poffs, locref.noffs
+
+
+def _covers(poly: Polygon, ls: LineString) -> bool:
+    """poly.covers(ls), rejecting a LineString that reaches outside the polygon's envelope without calling GEOS"""
+    p_minx, p_miny, p_maxx, p_maxy = poly.bounds
+    minx, miny, maxx, maxy = ls.bounds
+    return (
+        p_minx <= minx
+        and p_miny <= miny
+        and maxx <= p_maxx
+        and maxy <= p_maxy
+        and poly.covers(ls)
+    )
+
+
+def _path_start(coords: np.ndarray) -> Tuple[float, float, int, int]:
+    """
+    Returns the lon/lat of the first of the path of lon/lat pairs in `coords`, the bearing from there to the point
+    20 meters along the path, and the length of the path, as needed for an LRP placed at the start of the path
+    """
+    lon, lat = coords[0]
+    # one geodesic pass over the segments serves both the bearing point and the length
+    lengths = geometry.segment_lengths(coords)
+    bearing = geoutils.bearing(GeoCoordinates(lon, lat), geometry.interpolate(coords, 20, lengths))
+    return lon, lat, int(bearing), int(lengths.sum())
+
+
+# Decoder configs that each relax a single attribute check, tried in order once a path is known to exist within the
+# buffer, with the result reported if that config manages to decode the location
+_RELAXED_PROBES = (
+    (IgnoreFRC, AnalysisResult.FRC_MISMATCH),
+    (IgnoreFOW, AnalysisResult.FOW_MISMATCH),
+    (IgnorePathLength, AnalysisResult.PATH_LENGTH_MISMATCH),
+    (IgnoreBearing, AnalysisResult.BEARING_MISMATCH),
+)
+
+# Result reported for the score component (geolocation, bearing, FRC, FOW) that contributed most to an outside
+# candidate being preferred
+_SCORE_RESULTS = (
+    AnalysisResult.BETTER_GEOLOCATION_FOUND,
+    AnalysisResult.BETTER_BEARING_FOUND,
+    AnalysisResult.BETTER_FRC_FOUND,
+    AnalysisResult.BETTER_FOW_FOUND,
+)
+
+
 class Analyzer:
+    # number of match_location() results remembered per Analyzer
+    MATCH_CACHE_SIZE = 8192
+    # number of source buffers remembered per Analyzer
+    BUFFER_CACHE_SIZE = 1024
 
     def __init__(
             self,
@@ -38,6 +105,26 @@ class Analyzer:
         self.buffer_radius = buffer_radius
         self.lrp_radius = lrp_radius
         self.map_bounds = map_bounds
+        # read once here rather than on every diagnose_score() call
+        config = map_reader.config
+        self._config = config
+        self._geo_tool = map_reader.geo_tool
+        self._weights = (
+            config.geo_weight,
+            config.bear_weight,
+            config.frc_weight,
+            config.fow_weight,
+        )
+        # reused by every diagnose_score() call
+        self._out_score_collector = ScoreCollector()
+        self._in_score_collector = ScoreCollector()
+        if map_bounds is not None:
+            # tested against every source geometry
+            shapely.prepare(map_bounds)
+        self._match_cache: OrderedDict[
+            tuple, Tuple[LineLocation, LineString, CandidateCollector] | MatchResult
+        ] = OrderedDict()
+        self._buffer_cache: OrderedDict[bytes, Polygon] = OrderedDict()
 
     @staticmethod
     def determine_restricted_decoding_failure_cause(
@@ -47,15 +134,11 @@ class Analyzer:
 
         if not buffer_map_reader.match(config=AnyPath):
             return AnalysisResult.MISSING_OR_MISCONFIGURED_ROAD
-        if buffer_map_reader.match(config=IgnoreFRC):
-            return AnalysisResult.FRC_MISMATCH
-        if buffer_map_reader.match(config=IgnoreFOW):
-            return AnalysisResult.FOW_MISMATCH
-        if buffer_map_reader.match(config=IgnorePathLength):
-            return AnalysisResult.PATH_LENGTH_MISMATCH
-        if buffer_map_reader.match(config=IgnoreBearing):
-            return AnalysisResult.BEARING_MISMATCH
+        for config, result in _RELAXED_PROBES:
+            if buffer_map_reader.match(config=config):
+                return result
         return AnalysisResult.MULTIPLE_ATTRIBUTE_MISMATCHES
+
     @staticmethod
     def build_decoded_ls(decode_result: LineLocation) -> LineString:
         """
@@ -70,33 +153,21 @@ class Analyzer:
             LineString representing the decoded location
 
         """
-        ls: LineString = geoutils.join_lines([line.geometry for line in decode_result.lines])
+        # kept as a coordinate array, so that cutting the offsets doesn't have to extract it again
+        coords = geometry.join_coords([line.geometry for line in decode_result.lines])
         if decode_result.p_off > 0.0 or decode_result.n_off > 0.0:
             pos_off: float = decode_result.p_off
             neg_off: float = decode_result.n_off
-            ls_length: float = sum([line.length for line in decode_result.lines])
+            ls_length: float = sum(line.length for line in decode_result.lines)
             if ls_length - pos_off - neg_off < 1.0:
                 # The decoded line is shorter than the sum of the offsets
                 # Adjusts the offsets such that the line is at least 1 meter long
                 additional_length: float = max((pos_off + neg_off - ls_length) / 2.0, 1.0)
                 pos_off = max(pos_off - additional_length, 0)
                 neg_off = max(neg_off - additional_length, 0)
-            if pos_off > 0.0:
-                _, front = split_line(ls, pos_off)
-                if front is None:
-                    return LineString([ls.coords[-1], ls.coords[-1]])
-            else:
-                front = ls
-            if neg_off > 0.0:
-                _, back = split_line(front.reverse(), neg_off)
-                if back is None:
-                    return LineString([front.coords[0], front.coords[0]])
-                back = back.reverse()
-            else:
-                back = front
-            return back
-        else:
-            return ls
+            if pos_off > 0.0 or neg_off > 0.0:
+                return geometry.substring(coords, pos_off, neg_off)
+        return LineString(coords)
 
     @staticmethod
     def adjust_locref(
@@ -115,57 +186,23 @@ class Analyzer:
             # nothing to do
             return locref
 
-        lrps: List[LocationReferencePoint] = locref.points
+        # copy, since locref may be shared via the binary_decode cache
+        lrps: List[LocationReferencePoint] = list(locref.points)
 
+        split = None
         if locref.poffs > 0.0:
-            p = Point(lrps[1].lon, lrps[1].lat)
-            pref, _ = geoutils.split_line_at_point(ls, p)
-            dnp = geoutils.line_string_length(pref)
-            bearing_point = geoutils.interpolate(
-                [GeoCoordinates(c[0], c[1]) for c in pref.coords], 20
-            )
-            bearing = geoutils.bearing(
-                GeoCoordinates(pref.coords[0][0], pref.coords[0][1]), bearing_point
-            )
-            lrps[0] = LocationReferencePoint(
-                lon=pref.coords[0][0],
-                lat=pref.coords[0][1],
-                frc=lrps[0].frc,
-                fow=lrps[0].fow,
-                bear=int(bearing),
-                lfrcnp=lrps[0].lfrcnp,
-                dnp=int(dnp),
-            )
+            split = geoutils.split_line_at_point(ls, Point(lrps[1].lon, lrps[1].lat))
+            lon, lat, bearing, dnp = _path_start(np.asarray(split[0].coords))
+            lrps[0] = lrps[0]._replace(lon=lon, lat=lat, bear=bearing, dnp=dnp)
 
         if locref.noffs > 0.0:
-            p = Point(lrps[-2].lon, lrps[-2].lat)
-            _, suff = geoutils.split_line_at_point(ls, p)
-            dnp = geoutils.line_string_length(suff)
-            bearing_point = geoutils.interpolate(
-                [GeoCoordinates(c[0], c[1]) for c in suff.reverse().coords], 20
-            )
-            bearing = geoutils.bearing(
-                GeoCoordinates(suff.coords[-1][0], suff.coords[-1][1]), bearing_point
-            )
-
-            lrps[-2] = LocationReferencePoint(
-                lon=lrps[-2].lon,
-                lat=lrps[-2].lat,
-                frc=lrps[-2].frc,
-                fow=lrps[-2].fow,
-                bear=lrps[-2].bear,
-                lfrcnp=lrps[-2].lfrcnp,
-                dnp=int(dnp),
-            )
-            lrps[-1] = LocationReferencePoint(
-                lon=suff.coords[-1][0],
-                lat=suff.coords[-1][1],
-                frc=lrps[-1].frc,
-                fow=lrps[-1].fow,
-                bear=int(bearing),
-                lfrcnp=lrps[-1].lfrcnp,
-                dnp=lrps[-1].dnp,
-            )
+            # with three LRPs, the second-to-last is the middle LRP the line was already split at
+            if split is None or len(lrps) != 3:
+                split = geoutils.split_line_at_point(ls, Point(lrps[-2].lon, lrps[-2].lat))
+            # the last LRP's bearing is measured walking back from the end of the line
+            lon, lat, bearing, dnp = _path_start(np.asarray(split[1].coords)[::-1])
+            lrps[-2] = lrps[-2]._replace(dnp=dnp)
+            lrps[-1] = lrps[-1]._replace(lon=lon, lat=lat, bear=bearing)
 
         return LineLocationReference(points=lrps, poffs=0, noffs=0)
 
@@ -190,6 +227,30 @@ class Analyzer:
             lrp_radius=self.lrp_radius,
         )
 
+    def get_buffered(self, ls: LineString) -> Polygon:
+        """
+        Return the buffer around a source LineString, reusing the buffer built for an identical LineString earlier
+
+        Args:
+            ls: LineString representing the encoded location
+
+        Returns:
+            polygonal buffer of this Analyzer's buffer radius around the LineString
+        """
+        key = ls.wkb
+        cache = self._buffer_cache
+        buffered_ls = cache.get(key)
+        if buffered_ls is not None:
+            cache.move_to_end(key)
+            return buffered_ls
+        buffered_ls = buffer_wgs84_geometry(ls, shapely.get_point(ls, 0), self.buffer_radius)
+        # the buffer is tested against several decoded geometries and by the BufferReader
+        shapely.prepare(buffered_ls)
+        cache[key] = buffered_ls
+        if len(cache) > self.BUFFER_CACHE_SIZE:
+            cache.popitem(last=False)
+        return buffered_ls
+
     def match_binary(
             self, binstr: str
     ) -> Tuple[LineLocation, LineString, CandidateCollector] | MatchResult:
@@ -203,7 +264,7 @@ class Analyzer:
             MatchResult indicating the reason for failure
 
         """
-        t_locref: LineLocationReference = binary_decode(binstr)
+        t_locref: LineLocationReference = _cached_binary_decode(binstr)
         if not isinstance(t_locref, LineLocationReference):
             return MatchResult.UNKNOWN_LOCATION_REFERENCE_TYPE
         loc_ref = cast(LineLocationReference, t_locref)
@@ -219,9 +280,25 @@ class Analyzer:
 
         Returns:
             Tuple of LineLocation, decoded LineString, and CandidateCollector if the match was successful, or a
-            MatchResult indicating the reason for failure
+            MatchResult indicating the reason for failure.  Results are cached, so the returned CandidateCollector
+            must be treated as read-only.
 
         """
+        key = _locref_key(locref)
+        cache = self._match_cache
+        result = cache.get(key)
+        if result is not None:
+            cache.move_to_end(key)
+            return result
+        result = self._match_location(locref)
+        cache[key] = result
+        if len(cache) > self.MATCH_CACHE_SIZE:
+            cache.popitem(last=False)
+        return result
+
+    def _match_location(
+            self, locref: LineLocationReference
+    ) -> Tuple[LineLocation, LineString, CandidateCollector] | MatchResult:
         observer = CandidateCollector()
         location = self.map_reader.match_location(locref, observer=observer)
         if location is None:
@@ -231,61 +308,137 @@ class Analyzer:
         decoded_ls = self.build_decoded_ls(location)
         return location, decoded_ls, observer
 
+    def analyze_batch(
+            self, records: Sequence[Tuple[str, LineString]]
+    ) -> List[Tuple[str, AnalysisResult, float] | Exception]:
+        """
+        Analyze a batch of location references against a map.  The fractions of the decoded geometries that lie
+        within their buffers are computed together in one vectorized shapely call.
+
+        Args:
+            records: sequence of (OpenLR code, source LineString) pairs
+
+        Returns:
+            the result of analyze() for each record, in order, or the exception raised while analyzing it, so
+            that one failing record does not abort the rest of the batch
+        """
+        analyze = self._analyze
+        results: List[Tuple[str, AnalysisResult, float] | Exception] = []
+        append = results.append
+        # index into results, buffer and decoded geometry of each record whose fraction is still to be computed
+        pending: List[int] = []
+        buffers: List[Polygon] = []
+        decoded: List[LineString] = []
+        if self.map_bounds:
+            # one vectorized test of the whole batch against the (prepared) map bounds
+            in_bounds = shapely.covers(self.map_bounds, [ls for _, ls in records]).tolist()
+        else:
+            in_bounds = [True] * len(records)
+        for (olr, ls), inside in zip(records, in_bounds):
+            if not inside:
+                append((olr, AnalysisResult.OUTSIDE_MAP_BOUNDS, 0.0))
+                continue
+            try:
+                olr, res, frac, overlap = analyze(olr, ls, check_bounds=False)
+            except Exception as e:
+                append(e)
+                continue
+            if overlap is not None:
+                pending.append(len(results))
+                buffers.append(overlap[0])
+                decoded.append(overlap[1])
+            append((olr, res, frac))
+        if pending:
+            try:
+                within = shapely.length(shapely.intersection(buffers, decoded)).tolist()
+            except shapely.errors.GEOSException:
+                # one invalid buffer fails the whole vectorized call: redo the records one at a time, so that only
+                # the failing ones become exceptions
+                within = []
+                for buffer, decoded_ls in zip(buffers, decoded):
+                    try:
+                        within.append(intersection(buffer, decoded_ls).length)
+                    except shapely.errors.GEOSException as e:
+                        within.append(e)
+            lengths = shapely.length(decoded).tolist()
+            for i, w, length in zip(pending, within, lengths):
+                if isinstance(w, Exception):
+                    results[i] = w
+                elif length == 0.0:
+                    # as analyze() would have raised for this record
+                    results[i] = ZeroDivisionError("float division by zero")
+                else:
+                    olr, res, _ = results[i]
+                    results[i] = (olr, res, w / length)
+        return results
+
     def analyze(self, olr: str, ls: LineString) -> Tuple[str, AnalysisResult, float]:
         """Analyze a location reference against a map"""
+        olr, res, frac, overlap = self._analyze(olr, ls)
+        if overlap is not None:
+            buffered_ls, decoded_ls = overlap
+            frac = intersection(buffered_ls, decoded_ls).length / decoded_ls.length
+        return olr, res, frac
+
+    def _analyze(
+            self, olr: str, ls: LineString, check_bounds: bool = True
+    ) -> Tuple[str, AnalysisResult, float, Optional[Tuple[Polygon, LineString]]]:
+        """
+        Analyze a location reference against a map, leaving the fraction of the decoded geometry within the buffer
+        to the caller: if the last element of the result is a (buffer, decoded geometry) pair, the fraction has
+        still to be computed from it, otherwise the third element holds the fraction.  The map bounds test is
+        skipped if check_bounds is False, for callers that have already done it.
+        """
         logging.debug("Beginning analysis of OpenLR %s", olr)
-        if self.map_bounds and not self.map_bounds.covers(ls):
-            return olr, AnalysisResult.OUTSIDE_MAP_BOUNDS, 0.0
+        if check_bounds and self.map_bounds and not _covers(self.map_bounds, ls):
+            return olr, AnalysisResult.OUTSIDE_MAP_BOUNDS, 0.0, None
 
-        t_loc_ref: LineLocationReference = binary_decode(olr)
+        t_loc_ref: LineLocationReference = _cached_binary_decode(olr)
         if not isinstance(t_loc_ref, LineLocationReference):
-            return olr, AnalysisResult.UNSUPPORTED_LOCATION_TYPE, 0.0
+            return olr, AnalysisResult.UNSUPPORTED_LOCATION_TYPE, 0.0, None
         # narrow type of LocationReference
         loc_ref: LineLocationReference = cast(LineLocationReference, t_loc_ref)
 
-        match self.match_location(loc_ref):
-            case (line_location, decoded_ls, observer):
-                buffered_ls: Polygon = buffer_wgs84_geometry(
-                    ls, Point(ls.coords[0]), self.buffer_radius
-                )
-                if buffered_ls.covers(decoded_ls):
-                    return olr, AnalysisResult.OK, 1.0
-                else:
-                    percentage_within_buffer = (
-                            intersection(buffered_ls, decoded_ls).length / decoded_ls.length
-                    )
-                    if line_location.p_off > 0 or line_location.n_off > 0:
-                        return (
-                            olr,
-                            self.adjust_locref_and_match(
-                                loc_ref,
-                                line_location,
-                                decoded_ls,
-                                buffered_ls,
-                                observer,
-                            ),
-                            percentage_within_buffer,
-                        )
-                    else:
-                        return (
-                            olr,
-                            self.analyze_within_buffer(
-                                loc_ref, line_location, buffered_ls, observer
-                            ),
-                            percentage_within_buffer,
-                        )
-            case MatchResult.DECODING_FAILED:
-                buffered_ls: Polygon = buffer_wgs84_geometry(
-                    ls, Point(ls.coords[0]), self.buffer_radius
-                )
-                buffer_map_reader = self.create_buffer_reader(loc_ref, buffered_ls)
-                return (
-                    olr,
-                    self.determine_restricted_decoding_failure_cause(buffer_map_reader),
-                    0.0,
-                )
-            case MatchResult.UNKNOWN_LOCATION_REFERENCE_TYPE:
-                return olr, AnalysisResult.UNSUPPORTED_LOCATION_TYPE, 0.0
+        # the buffer is needed by every remaining outcome, so build it once up front
+        buffered_ls: Polygon = self.get_buffered(ls)
+
+        match_result = self.match_location(loc_ref)
+        if match_result is MatchResult.DECODING_FAILED:
+            buffer_map_reader = self.create_buffer_reader(loc_ref, buffered_ls)
+            return (
+                olr,
+                self.determine_restricted_decoding_failure_cause(buffer_map_reader),
+                0.0,
+                None,
+            )
+        if match_result is MatchResult.UNKNOWN_LOCATION_REFERENCE_TYPE:
+            return olr, AnalysisResult.UNSUPPORTED_LOCATION_TYPE, 0.0, None
+
+        line_location, decoded_ls, observer = match_result
+        if _covers(buffered_ls, decoded_ls):
+            return olr, AnalysisResult.OK, 1.0, None
+        overlap = (buffered_ls, decoded_ls)
+        if line_location.p_off > 0 or line_location.n_off > 0:
+            return (
+                olr,
+                self.adjust_locref_and_match(
+                    loc_ref,
+                    line_location,
+                    decoded_ls,
+                    buffered_ls,
+                    observer,
+                ),
+                0.0,
+                overlap,
+            )
+        return (
+            olr,
+            self.analyze_within_buffer(
+                loc_ref, line_location, buffered_ls, observer
+            ),
+            0.0,
+            overlap,
+        )
 
     def adjust_locref_and_match(
             self,
@@ -299,26 +452,35 @@ class Analyzer:
             adj_loc_ref = self.adjust_locref(loc_ref, decoded_ls)
         except GeodError:
             return AnalysisResult.INVALID_GEOMETRY
-        match self.match_location(adj_loc_ref):
-            case (adj_loc, decoded_ls, adj_observer):
-                if buffered_ls.covers(decoded_ls):
-                    return self.compare_locations(
-                        unrestricted_line_location,
-                        observer,
-                        adj_loc,
-                        adj_observer,
-                    )
-                else:
-                    return self.analyze_within_buffer(
-                        adj_loc_ref, adj_loc, buffered_ls, adj_observer
-                    )
-            case MatchResult.DECODING_FAILED:
-                buffer_map_reader = self.create_buffer_reader(loc_ref, buffered_ls)
-                return self.determine_restricted_decoding_failure_cause(
-                    buffer_map_reader
-                )
-            case MatchResult.UNKNOWN_LOCATION_REFERENCE_TYPE:
-                return AnalysisResult.UNSUPPORTED_LOCATION_TYPE
+        if adj_loc_ref is loc_ref:
+            # no offsets to remove, so matching again would only reproduce the unrestricted match
+            return self.analyze_within_buffer(
+                loc_ref, unrestricted_line_location, buffered_ls, observer
+            )
+        match_result = self.match_location(adj_loc_ref)
+        if match_result is MatchResult.DECODING_FAILED:
+            buffer_map_reader = self.create_buffer_reader(loc_ref, buffered_ls)
+            return self.determine_restricted_decoding_failure_cause(
+                buffer_map_reader
+            )
+        if match_result is MatchResult.UNKNOWN_LOCATION_REFERENCE_TYPE:
+            return AnalysisResult.UNSUPPORTED_LOCATION_TYPE
+
+        adj_loc, adj_decoded_ls, adj_observer = match_result
+        # the caller has established that the unadjusted decoding is not covered by the buffer, so an
+        # adjusted decoding with the same geometry needs no second covers() test
+        if not adj_decoded_ls.equals_exact(decoded_ls, 1e-9) and _covers(
+                buffered_ls, adj_decoded_ls
+        ):
+            return self.compare_locations(
+                unrestricted_line_location,
+                observer,
+                adj_loc,
+                adj_observer,
+            )
+        return self.analyze_within_buffer(
+            adj_loc_ref, adj_loc, buffered_ls, adj_observer
+        )
 
     def analyze_within_buffer(
             self,
@@ -349,29 +511,47 @@ class Analyzer:
             outside: Candidate,
             inside: Candidate,
             is_last: bool,
+            outside_obs: Optional[CandidateCollector] = None,
     ) -> AnalysisResult:
         # assert outside.score >= inside.score
-        out_score_collector = ScoreCollector()
-        list(
-            make_candidates(
-                lrp,
-                outside.line,
-                self.map_reader.config,
-                out_score_collector,
-                is_last,
-                self.map_reader.geo_tool,
-            )
+        config = self._config
+        geo_tool = self._geo_tool
+        out_score_collector = self._out_score_collector
+        out_score_collector.reset()
+        # The outside candidate was chosen by a decode against the full map with this same config, so its scores
+        # have normally been recorded by that decode's collector already
+        out_scores = (
+            outside_obs.scores.get((lrp, outside.line.line_id))
+            if outside_obs is not None
+            else None
         )
-        in_score_collector = ScoreCollector()
-        list(
+        if out_scores is not None:
+            out_score_collector.on_candidate_score(lrp, outside, *out_scores)
+        else:
+            # the candidates themselves are not needed, only the scores reported to the collector
+            deque(
+                make_candidates(
+                    lrp,
+                    outside.line,
+                    config,
+                    out_score_collector,
+                    is_last,
+                    geo_tool,
+                ),
+                maxlen=0,
+            )
+        in_score_collector = self._in_score_collector
+        in_score_collector.reset()
+        deque(
             make_candidates(
                 lrp,
                 inside.line,
-                self.map_reader.config,
+                config,
                 in_score_collector,
                 is_last,
-                self.map_reader.geo_tool,
-            )
+                geo_tool,
+            ),
+            maxlen=0,
         )
 
         if in_score_collector.frc_reject:
@@ -381,29 +561,17 @@ class Analyzer:
         if in_score_collector.score_reject:
             return AnalysisResult.BETTER_SCORE_FOUND
 
-        components = [0.0, 0.0, 0.0, 0.0]
-        components[0] = self.map_reader.config.geo_weight * (
-                out_score_collector.geo_score - in_score_collector.geo_score
-        )
-        components[1] = self.map_reader.config.bear_weight * (
-                out_score_collector.bear_score - in_score_collector.bear_score
-        )
-        components[2] = self.map_reader.config.frc_weight * (
-                out_score_collector.frc_score - in_score_collector.frc_score
-        )
-        components[3] = self.map_reader.config.fow_weight * (
-                out_score_collector.fow_score - in_score_collector.fow_score
-        )
+        geo_weight, bear_weight, frc_weight, fow_weight = self._weights
+        out_sc, in_sc = out_score_collector, in_score_collector
+        components = [
+            geo_weight * (out_sc.geo_score - in_sc.geo_score),
+            bear_weight * (out_sc.bear_score - in_sc.bear_score),
+            frc_weight * (out_sc.frc_score - in_sc.frc_score),
+            fow_weight * (out_sc.fow_score - in_sc.fow_score),
+        ]
 
-        match components.index(max(components)):
-            case 0:
-                return AnalysisResult.BETTER_GEOLOCATION_FOUND
-            case 1:
-                return AnalysisResult.BETTER_BEARING_FOUND
-            case 2:
-                return AnalysisResult.BETTER_FRC_FOUND
-            case 3:
-                return AnalysisResult.BETTER_FOW_FOUND
+        # the first of equally large components wins, as with components.index(max(components))
+        return _SCORE_RESULTS[max(range(4), key=components.__getitem__)]
 
     def compare_locations(
             self,
@@ -412,41 +580,48 @@ class Analyzer:
             inside_loc: LineLocation,
             inside_obs: CandidateCollector,
     ) -> AnalysisResult:
-        assert len(outside_obs.candidates) == len(inside_obs.candidates)
-        outside_pairs = [
-            outside_obs.candidates[i] for i in sorted(outside_obs.candidates)
-        ]
-        inside_pairs = [inside_obs.candidates[i] for i in sorted(inside_obs.candidates)]
-
-        if (outside_pairs[0][1].line.line_id != inside_pairs[0][1].line.line_id) and (
-                outside_pairs[0][1].line.end_node.node_id
-                != inside_pairs[0][1].line.start_node.node_id
+        n = len(outside_obs)
+        assert n == len(inside_obs)
+        out_ids, in_ids = outside_obs.line_ids, inside_obs.line_ids
+        out_cands, in_cands = outside_obs.candidates, inside_obs.candidates
+        if out_ids == in_ids:
+            # every LRP was placed on the same line in both decodings, so none of the checks below can fail
+            return AnalysisResult.ALTERNATE_SHORTEST_PATH
+
+        out_lrps, in_lrps = outside_obs.lrps, inside_obs.lrps
+
+        out_first, in_first = out_cands[0], in_cands[0]
+        if (out_ids[0] != in_ids[0]) and (
+                out_first.line.end_node.node_id != in_first.line.start_node.node_id
         ):
             return self.diagnose_score(
-                lrp=outside_pairs[0][0],
-                outside=outside_pairs[0][1],
-                inside=inside_pairs[0][1],
+                lrp=out_lrps[0],
+                outside=out_first,
+                inside=in_first,
                 is_last=False,
+                outside_obs=outside_obs,
             )
 
-        for outside, inside in zip(
-                outside_pairs[1:-1],
-                inside_pairs[1:-1],
-        ):
-            assert outside[0] == inside[0]
-            if outside[1].line.line_id != inside[1].line.line_id:
+        for i in range(1, n - 1):
+            assert out_lrps[i] == in_lrps[i]
+            if out_ids[i] != in_ids[i]:
                 return self.diagnose_score(
-                    lrp=outside[0], outside=outside[1], inside=inside[1], is_last=False
+                    lrp=out_lrps[i],
+                    outside=out_cands[i],
+                    inside=in_cands[i],
+                    is_last=False,
+                    outside_obs=outside_obs,
                 )
 
-        if (outside_pairs[-1][1].line.line_id != inside_pairs[-1][1].line.line_id) and (
-                outside_pairs[-1][1].line.start_node.node_id
-                != inside_pairs[-1][1].line.end_node.node_id
+        out_last, in_last = out_cands[-1], in_cands[-1]
+        if (out_ids[-1] != in_ids[-1]) and (
+                out_last.line.start_node.node_id != in_last.line.end_node.node_id
         ):
             return self.diagnose_score(
-                lrp=outside_pairs[-1][0],
-                outside=outside_pairs[-1][1],
-                inside=inside_pairs[-1][1],
+                lrp=out_lrps[-1],
+                outside=out_last,
+                inside=in_last,
                 is_last=True,
+                outside_obs=outside_obs,
             )
         return AnalysisResult.ALTERNATE_SHORTEST_PATH
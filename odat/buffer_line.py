@@ -1,13 +1,33 @@
-import geoutils
+from typing import Optional
+
+import numpy as np
+import shapely
 from openlr import FRC, FOW
 from openlr_dereferencer.maps import Line as AbstractLine
 from pyproj import Geod
-from shapely import LineString, Polygon, Point
+from shapely import LineString
+
+from odat.geometry import distance_to_path
 
 GEOD = Geod(ellps="WGS84")
 
 
 class Line(AbstractLine):
+    # the openlr_dereferencer base classes don't declare __slots__, so instances keep an (empty) __dict__, but the
+    # attributes below are stored in fixed slots
+    __slots__ = (
+        "id",
+        "map_reader",
+        "_fow",
+        "_frc",
+        "_length",
+        "from_int",
+        "to_int",
+        "_geometry",
+        "contained_in_buffer",
+        "entry_or_exit",
+        "_coords",
+    )
 
     def __init__(
         self,
@@ -18,8 +38,9 @@ class Line(AbstractLine):
         length: float,
         from_int: str,
         to_int: str,
-        geometry: LineString,
-        buffer: Polygon,
+        geometry: Optional[LineString],
+        contained_in_buffer: bool,
+        coords: Optional[np.ndarray] = None,
     ):
         self.id: str = line_id
         self.map_reader: "BufferReader" = map_reader
@@ -28,9 +49,11 @@ class Line(AbstractLine):
         self._length: float = length
         self.from_int: str = from_int
         self.to_int: str = to_int
-        self._geometry: LineString = geometry
-        self.contained_in_buffer = buffer.contains(self._geometry)
+        # when None, the geometry is built from `coords` on first use
+        self._geometry: Optional[LineString] = geometry
+        self.contained_in_buffer = contained_in_buffer
         self.entry_or_exit = False
+        self._coords: Optional[np.ndarray] = coords
 
     def __repr__(self):
         return f"Line with id={self.line_id} of length {self.length}"
@@ -61,13 +84,22 @@ class Line(AbstractLine):
         return self._fow
 
     @property
-    def geometry(self):
+    def geometry(self) -> LineString:
+        if self._geometry is None:
+            self._geometry = shapely.linestrings(self._coords)
         return self._geometry
 
+    @property
+    def coords(self) -> np.ndarray:
+        """The (N, 2) array of lon/lat pairs of the geometry, extracted on first use unless given to __init__"""
+        if self._coords is None:
+            self._coords = shapely.get_coordinates(self._geometry)
+        return self._coords
+
     def distance_to(self, coord) -> float:
         """Returns the distance of this line to `coord` in meters"""
         # if (self.geometry.coords[0] == coord or self.geometry.coords[-1] == coord) or (
         #     self.geometry.coords[0] == self.geometry.coords[-1]
         # ):
         #     return 0.0
-        return geoutils.distance_between(self.geometry, Point(coord.lon, coord.lat))
+        return distance_to_path(self.coords, coord[0], coord[1])
@@ -1,13 +1,10 @@
-from typing import Optional, Iterable
+from typing import Optional, Iterable, List, Sequence, Tuple
 
 from openlr import Coordinates
-from shapely import Polygon, Point
 from openlr_dereferencer.maps import Node as AbstractNode
 
 from odat.buffer_line import Line
 
-from itertools import chain
-
 def are_peers(candidate: Line, source: Optional[Line]) -> bool:
     """
     Returns True if candidate and source are peer lines, i.e. they are
@@ -33,7 +30,30 @@ def are_peers(candidate: Line, source: Optional[Line]) -> bool:
         )
 
 
+def _usable_lines(
+    in_buffer: Tuple[Line, ...], entry_or_exit: Optional[List[Line]], source: Optional[Line]
+) -> Sequence[Line]:
+    """
+    Returns the lines adjacent to a node that the decoder may use: those contained in the buffer, followed by
+    those marked as entry_or_exit, less the peer of `source`
+    """
+    lines = in_buffer + tuple(entry_or_exit) if entry_or_exit else in_buffer
+    if source is None:
+        return lines
+    return [line for line in lines if not are_peers(line, source)]
+
+
 class Node(AbstractNode):
+    __slots__ = (
+        "lon",
+        "lat",
+        "id",
+        "map_reader",
+        "incoming_lines_cache",
+        "outgoing_lines_cache",
+        "contained_in_buffer",
+        "_connected",
+    )
 
     def __init__(
         self,
@@ -41,7 +61,7 @@ class Node(AbstractNode):
         node_id: str,
         lon: float,
         lat: float,
-        buffer: Polygon,
+        contained_in_buffer: bool,
     ):
         self.lon = lon
         self.lat = lat
@@ -49,7 +69,9 @@ class Node(AbstractNode):
         self.map_reader = map_reader
         self.incoming_lines_cache = []
         self.outgoing_lines_cache = []
-        self.contained_in_buffer = buffer.contains(Point(lon, lat))
+        self.contained_in_buffer = contained_in_buffer
+        # connected_lines(), built on first use and reset when a line of this node is marked as entry_or_exit
+        self._connected: Optional[Tuple[Line, ...]] = None
 
     @property
     def node_id(self):
@@ -60,24 +82,24 @@ class Node(AbstractNode):
         return Coordinates(lon=self.lon, lat=self.lat)
 
     def outgoing_lines(self, source: Optional[Line] = None) -> Iterable[Line]:
-        if self.id in self.map_reader.outgoing_lines:
-            return [
-                line
-                for line in self.map_reader.outgoing_lines[self.id]
-                if (line.contained_in_buffer or line.entry_or_exit) and not are_peers(line, source)
-            ]
-        else:
-            return []
+        return _usable_lines(
+            self.map_reader.outgoing_in_buffer.get(self.id, ()),
+            self.map_reader.outgoing_entry_or_exit.get(self.id),
+            source,
+        )
 
     def incoming_lines(self, source: Optional[Line] = None) -> Iterable[Line]:
-        if self.id in self.map_reader.incoming_lines:
-            return [
-                line
-                for line in self.map_reader.incoming_lines[self.id]
-                if (line.contained_in_buffer or line.entry_or_exit) and not are_peers(line, source)
-            ]
-        else:
-            return []
+        return _usable_lines(
+            self.map_reader.incoming_in_buffer.get(self.id, ()),
+            self.map_reader.incoming_entry_or_exit.get(self.id),
+            source,
+        )
+
+    def reset_connected_lines(self):
+        """Drops the cached connected_lines(), after the lines that the decoder may use have changed"""
+        self._connected = None
 
     def connected_lines(self) -> Iterable[Line]:
-        return chain(self.incoming_lines(), self.outgoing_lines())
+        if self._connected is None:
+            self._connected = tuple(self.incoming_lines()) + tuple(self.outgoing_lines())
+        return self._connected
@@ -19,24 +19,70 @@ from __future__ import annotations
 
 import logging
 from contextlib import closing
-from math import sqrt
-from typing import Iterable, Optional, cast, Dict, Set
+from functools import lru_cache
+from math import cos, radians, sqrt
+from typing import Iterable, Optional, cast, Dict, List, Tuple
 
+import numpy as np
 from geoutils import distance
 from openlr import Coordinates, FOW, FRC
 from openlr.locations import LineLocationReference
 from openlr_dereferencer import decode, Config, DecoderObserver
 from openlr_dereferencer.decoding import MapObjects, DEFAULT_CONFIG
 from openlr_dereferencer.maps import MapReader
-from shapely import wkb
+import shapely
 from shapely.geometry import LineString, Polygon
 from webtool.map_databases.tomtom_sqlite import TomTomMapReaderSQLite
 
+from odat import geometry
 from odat.buffer_line import Line
 from odat.buffer_node import Node
 
 SQRT_2 = sqrt(2)
 
+# lower bounds of the length in meters of a degree of latitude, and of a degree of longitude at the equator, on
+# the WGS84 ellipsoid.  Dividing a distance by them overestimates its extent in degrees, which keeps the bounding
+# box prefilter in find_lines_close_to() from rejecting lines that are actually close enough.
+METERS_PER_DEGREE_LAT = 110_574.0
+METERS_PER_DEGREE_LON = 111_319.0
+
+
+def search_box(coord: Coordinates, dist: float) -> Polygon:
+    """
+    Returns a lon/lat box around `coord` that contains every point within `dist` meters of it.  The degree radii
+    are overestimated, so the box is slightly larger than it needs to be.
+    """
+    lon, lat = coord[0], coord[1]
+    r_lat = dist / METERS_PER_DEGREE_LAT
+    # a degree of longitude is shortest at the latitude farthest from the equator that is still in reach
+    r_lon = dist / (METERS_PER_DEGREE_LON * max(cos(radians(min(abs(lat) + r_lat, 90.0))), 1e-9))
+    return shapely.box(lon - r_lon, lat - r_lat, lon + r_lon, lat + r_lat)
+
+
+@lru_cache(maxsize=None)
+def _candidate_lines_sql(lines_table: str) -> str:
+    """
+    Returns the query for the lines intersecting a buffer.  Only the table name is interpolated; every value is
+    bound, and the buffer is passed as WKB, so that the text of the statement is the same for every BufferReader
+    and SQLite can reuse the statement it prepared for the connection.
+
+    The lines are found by joining the Spatialite R*Tree of the geometry column (idx_<table>_geom) directly,
+    rather than through the SpatialIndex virtual table, so that SQLite drives the R*Tree search itself.  The
+    bound values are the buffer's max_lon, min_lon, max_lat, min_lat and WKB.
+    """
+    return f"""
+        select
+            r.id, r.fow, r.frc, r.direction, r.start_id, r.end_id, r.length, st_asbinary(r.geom)
+        from
+            {lines_table} r
+        join
+            idx_{lines_table}_geom i on r.rowid = i.pkid
+        where
+            i.xmin <= ? and i.xmax >= ? and i.ymin <= ? and i.ymax >= ?
+        and
+            st_intersects(st_GeomFromWKB(?), r.geom)
+    """
+
 
 class WebToolMapException(Exception):
     pass
@@ -44,6 +90,8 @@ class WebToolMapException(Exception):
 
 # @MapReader.register
 class BufferReader(MapReader):
+    # number of candidate line rows fetched from SQLite and turned into Lines at a time
+    FETCH_SIZE = 1000
 
     def __init__(
         self,
@@ -55,6 +103,11 @@ class BufferReader(MapReader):
     ):
 
         self.loc_ref = loc_ref
+        # lon/lat of the first and last lrps, near which lines that are not contained in the buffer are allowed
+        self.endpoint_coords = {
+            (loc_ref.points[0][0], loc_ref.points[0][1]),
+            (loc_ref.points[-1][0], loc_ref.points[-1][1]),
+        }
         self.tomtom_map_reader = tomtom_map_reader
         self.connection = tomtom_map_reader.connection
         self.geo_tool = tomtom_map_reader.geo_tool
@@ -62,99 +115,144 @@ class BufferReader(MapReader):
         self.nodes_table = tomtom_map_reader.nodes_table
         self.lrp_radius = lrp_radius
         self.config = config
+        # prepared in place (a no-op if the caller already did so), so that the containment test of every
+        # node and line reuses the polygon's edge index
+        shapely.prepare(buffer)
         self.buffer = buffer
         self.nodes: Dict[str, Node] = {}
         self.lines: Dict[str, Line] = {}
-        self.all_lines: Set[Line] = set()
-        self.incoming_lines: Dict[str, Set[Line]] = {}
-        self.outgoing_lines: Dict[str, Set[Line]] = {}
+        self.all_lines: List[Line] = []
+        # the geometry of each line in all_lines; a reversed line shares the geometry of its forward twin
+        self.all_geometries: List[LineString] = []
+        self.incoming_lines: Dict[str, List[Line]] = {}
+        self.outgoing_lines: Dict[str, List[Line]] = {}
+        # the adjacent lines that the decoder may use, split into those contained in the buffer, which are fixed
+        # once the lines are created, and those marked as entry_or_exit by find_lines_close_to()
+        self.incoming_in_buffer: Dict[str, Tuple[Line, ...]] = {}
+        self.outgoing_in_buffer: Dict[str, Tuple[Line, ...]] = {}
+        self.incoming_entry_or_exit: Dict[str, List[Line]] = {}
+        self.outgoing_entry_or_exit: Dict[str, List[Line]] = {}
         self.candidates = {}
+        # results of find_lines_close_to(), keyed by (lon, lat, dist), shared by the decodes with different configs
+        self.close_lines: Dict[Tuple[float, float, float], List[Line]] = {}
+        # STRtrees over the geometries of all_lines and the positions of the nodes in node_list
+        self.line_tree = shapely.STRtree([])
+        self.node_list: List[Node] = []
+        self.node_tree = shapely.STRtree([])
+        # the coordinates of all_lines stored one line after the other, the indices of the first and last
+        # coordinate of each of their segments, and the index of the first segment and number of segments per line
+        self.line_coords: np.ndarray = np.empty((0, 2))
+        self.segment_starts: np.ndarray = np.empty(0, dtype=np.intp)
+        self.segment_ends: np.ndarray = np.empty(0, dtype=np.intp)
+        self.first_segment: np.ndarray = np.empty(0, dtype=np.intp)
+        self.segment_counts: np.ndarray = np.empty(0, dtype=np.intp)
         self.init_objects()
 
     def init_objects(self):
         self.find_all_candidate_lines()
+        # the coordinates of every node, taken from the first line that starts or ends there
+        endpoints: Dict[str, np.ndarray] = {}
+        for line in self.all_lines:
+            coords = line.coords
+            endpoints.setdefault(line.from_int, coords[0])
+            endpoints.setdefault(line.to_int, coords[-1])
+        if endpoints:
+            points = np.array(list(endpoints.values()), dtype=np.float64)
+            contained = shapely.contains_xy(self.buffer, points[:, 0], points[:, 1])
+            for node_id, (lon, lat), in_buffer in zip(endpoints, points.tolist(), contained.tolist()):
+                self.nodes[node_id] = Node(self, node_id, lon, lat, in_buffer)
         for line in self.all_lines:
-            self.nodes[line.from_int] = self.nodes.get(
-                line.from_int,
-                Node(
-                    self,
-                    line.from_int,
-                    line.geometry.coords[0][0],
-                    line.geometry.coords[0][1],
-                    self.buffer,
-                ),
-            )
-            self.nodes[line.to_int] = self.nodes.get(
-                line.to_int,
-                Node(
-                    self,
-                    line.to_int,
-                    line.geometry.coords[-1][0],
-                    line.geometry.coords[-1][1],
-                    self.buffer,
-                ),
-            )
             self.update_node_outgoing(line)
             self.update_node_incoming(line)
+        self.incoming_in_buffer = {
+            node_id: tuple(line for line in lines if line.contained_in_buffer)
+            for node_id, lines in self.incoming_lines.items()
+        }
+        self.outgoing_in_buffer = {
+            node_id: tuple(line for line in lines if line.contained_in_buffer)
+            for node_id, lines in self.outgoing_lines.items()
+        }
+        # the reversed lines are indexed with the geometry of their forward twin, which covers the same points
+        self.line_tree = shapely.STRtree(self.all_geometries)
+        if self.all_lines:
+            counts = np.array([len(line.coords) for line in self.all_lines], dtype=np.intp)
+            self.line_coords = np.concatenate([line.coords for line in self.all_lines])
+            self.segment_starts, self.segment_ends = geometry.path_segments(counts)
+            self.segment_counts = np.maximum(counts - 1, 1)
+            self.first_segment = np.cumsum(self.segment_counts) - self.segment_counts
+        self.node_list = list(self.nodes.values())
+        self.node_tree = shapely.STRtree(
+            shapely.points([node.lon for node in self.node_list], [node.lat for node in self.node_list])
+        )
 
     def find_all_candidate_lines(self) -> None:
         min_lon, min_lat, max_lon, max_lat = self.buffer.bounds
         with closing(self.connection.cursor()) as cursor:
-            sql = f"""
-                select
-                    r.id, r.fow, r.frc, r.direction, r.start_id, r.end_id, r.length, st_asbinary(r.geom)
-                from
-                    {self.lines_table} r
-                where
-                    rowid in ( SELECT ROWID FROM SpatialIndex WHERE f_table_name="{self.lines_table}" AND search_frame=buildmbr({min_lon}, {min_lat}, {max_lon}, {max_lat}))
-                and
-                    st_intersects(st_GeomFromText('{self.buffer.wkt}'), r.geom)
-            """
-            cursor.execute(sql)
-            self.create_lines(cursor.fetchall())
+            cursor.arraysize = self.FETCH_SIZE
+            cursor.execute(
+                _candidate_lines_sql(self.lines_table),
+                (max_lon, min_lon, max_lat, min_lat, self.buffer.wkb),
+            )
+            while rows := cursor.fetchmany():
+                self.create_lines(rows)
 
     def create_lines(self, rows) -> None:
-        for line_id, fow, frc, flowdir, start, end, length, geom in rows:
-            ls = LineString(wkb.loads(geom, hex=False))
+        rows = list(rows)
+        geoms = shapely.from_wkb([row[7] for row in rows])
+        # the coordinate arrays of all the lines, extracted at once and split per line
+        coords = np.split(shapely.get_coordinates(geoms), np.cumsum(shapely.get_num_coordinates(geoms))[:-1])
+        # a reversed line covers the same points, so both directions share the containment test
+        contained = shapely.contains(self.buffer, geoms).tolist()
+        for (line_id, fow, frc, flowdir, start, end, length, _), ls, xy, in_buffer in zip(
+            rows, geoms, coords, contained
+        ):
+            start, end, fow, frc = str(start), str(end), FOW(fow), FRC(frc)
             line = Line(
                 map_reader=self,
                 line_id=line_id,
-                from_int=str(start),
-                to_int=str(end),
-                fow=FOW(fow),
-                frc=FRC(frc),
+                from_int=start,
+                to_int=end,
+                fow=fow,
+                frc=frc,
                 length=length,
                 geometry=ls,
-                buffer=self.buffer,
+                contained_in_buffer=in_buffer,
+                coords=xy,
             )
             self.lines[line.id] = line
-            self.all_lines.add(line)
+            self.all_lines.append(line)
+            self.all_geometries.append(ls)
             if flowdir == 1:
                 rev_line = Line(
                     map_reader=self,
                     line_id="-" + line_id,
-                    from_int=str(end),
-                    to_int=str(start),
-                    fow=FOW(fow),
-                    frc=FRC(frc),
+                    from_int=end,
+                    to_int=start,
+                    fow=fow,
+                    frc=frc,
                     length=length,
-                    geometry=ls.reverse(),
-                    buffer=self.buffer,
+                    geometry=None,
+                    contained_in_buffer=in_buffer,
+                    coords=xy[::-1],
                 )
                 self.lines[rev_line.id] = rev_line
-                self.all_lines.add(rev_line)
+                self.all_lines.append(rev_line)
+                self.all_geometries.append(ls)
 
     def update_node_outgoing(self, line: Line):
-        if line.start_node.node_id in self.outgoing_lines:
-            self.outgoing_lines[str(line.start_node.node_id)].add(line)
-        else:
-            self.outgoing_lines[str(line.start_node.node_id)] = {line}
+        self.outgoing_lines.setdefault(line.from_int, []).append(line)
 
     def update_node_incoming(self, line: Line):
-        if line.end_node.node_id in self.incoming_lines:
-            self.incoming_lines[str(line.end_node.node_id)].add(line)
-        else:
-            self.incoming_lines[str(line.end_node.node_id)] = {line}
+        self.incoming_lines.setdefault(line.to_int, []).append(line)
+
+    def mark_entry_or_exit(self, line: Line):
+        """Lets the decoder use `line`, which is not contained in the buffer, to enter or leave it"""
+        if not line.contained_in_buffer and not line.entry_or_exit:
+            line.entry_or_exit = True
+            self.outgoing_entry_or_exit.setdefault(line.from_int, []).append(line)
+            self.incoming_entry_or_exit.setdefault(line.to_int, []).append(line)
+            self.nodes[line.from_int].reset_connected_lines()
+            self.nodes[line.to_int].reset_connected_lines()
 
     def match(
         self,
@@ -192,7 +290,7 @@ class BufferReader(MapReader):
                 ),
             )
         except Exception as e:
-            logging.info(f"Error during initial decode of {self.loc_ref}: {e}")
+            logging.info("Error during initial decode of %s: %s", self.loc_ref, e)
             return None
 
     def get_line(self, line_id: str) -> Line:
@@ -229,27 +327,50 @@ class BufferReader(MapReader):
     def find_nodes_close_to(self, coord: Coordinates, dist: float) -> Iterable[Node]:
         return [
             node
-            for node in self.nodes.values()
+            for node in self.nodes_near(coord, dist)
             if node.contained_in_buffer and distance(coord, node.coordinates) < dist
         ]
 
     def find_lines_close_to(self, coord: Coordinates, dist: float) -> Iterable[Line]:
+        key = (coord[0], coord[1], dist)
+        lines = self.close_lines.get(key)
+        if lines is None:
+            lines = self.close_lines[key] = self._find_lines_close_to(coord, dist)
+        return lines
+
+    def lines_near(self, coord: Coordinates, dist: float) -> List[Line]:
+        """
+        Returns the lines within `dist` meters of `coord`, in the order of self.all_lines.  The lines whose
+        bounding box intersects the search_box() around `coord` are shortlisted, and the distances to all of
+        their segments are then computed in one vectorized pass over the flattened line coordinates.
+        """
+        idx = np.sort(self.line_tree.query(search_box(coord, dist)))
+        if len(idx) == 0:
+            return []
+        counts = self.segment_counts[idx]
+        # position of the shortlisted lines' first segments among the selected segments
+        offsets = np.cumsum(counts) - counts
+        segments = np.arange(counts.sum()) + np.repeat(self.first_segment[idx] - offsets, counts)
+        distances = geometry.segment_distances(
+            self.line_coords,
+            self.segment_starts[segments],
+            self.segment_ends[segments],
+            coord[0],
+            coord[1],
+        )
+        near = np.minimum.reduceat(distances, offsets) < dist
+        return [self.all_lines[i] for i in idx[near]]
+
+    def nodes_near(self, coord: Coordinates, dist: float) -> List[Node]:
+        """Returns the nodes in the search_box() around `coord`, in the order of self.nodes"""
+        return [self.node_list[i] for i in np.sort(self.node_tree.query(search_box(coord, dist)))]
+
+    def _find_lines_close_to(self, coord: Coordinates, dist: float) -> List[Line]:
         # allow lines that are not contained in the buffer if they are being considered for the first or last lrp
-        if (
-            self.loc_ref.points[0][0] == coord[0]
-            and self.loc_ref.points[0][1] == coord[1]
-        ) or (
-            self.loc_ref.points[-1][0] == coord[0]
-            and self.loc_ref.points[-1][1] == coord[1]
-        ):
-            candidates = [ line for line in self.lines.values() if line.distance_to(coord) < dist ]
+        if (coord[0], coord[1]) in self.endpoint_coords:
+            candidates = self.lines_near(coord, dist)
             for line in candidates:
-                if not line.contained_in_buffer:
-                    line.entry_or_exit = True
+                self.mark_entry_or_exit(line)
             return candidates
         else:
-            return [
-                line
-                for line in self.lines.values()
-                if line.contained_in_buffer and line.distance_to(coord) < dist
-            ]
+            return [line for line in self.lines_near(coord, dist) if line.contained_in_buffer]
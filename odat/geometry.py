@@ -0,0 +1,166 @@
+"""
+    Versions of the geoutils helpers used on the analyzer's hot paths that work directly on the (N, 2) float64
+    arrays of lon/lat pairs exposed by shapely, rather than on a list of GeoCoordinates built per vertex.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import shapely
+from geoutils import GeoCoordinates
+from pyproj import Geod
+from shapely import LineString
+
+_GEOD = Geod(ellps="WGS84")
+_WGS84_A = 6_378_137.0
+_WGS84_E2 = 6.694_379_990_14e-3
+
+
+def meters_per_degree(lat: float) -> tuple:
+    """Returns the length in meters of a degree of longitude and of a degree of latitude at latitude `lat`"""
+    phi = np.radians(lat)
+    w = 1.0 - _WGS84_E2 * np.sin(phi) ** 2
+    # radii of curvature of the ellipsoid in the prime vertical and the meridian
+    n = _WGS84_A / np.sqrt(w)
+    m = _WGS84_A * (1.0 - _WGS84_E2) / w ** 1.5
+    return float(np.radians(n * np.cos(phi))), float(np.radians(m))
+
+
+def distance_to_path(coords: np.ndarray, lon: float, lat: float) -> float:
+    """
+    Returns the distance in meters from lon/lat to the path of lon/lat pairs in `coords`.  The path is projected
+    onto the plane tangent to the ellipsoid at lon/lat, which is accurate to a small fraction of a percent at the
+    tens of meters over which the decoder looks for candidate lines, and costs one vectorized pass over the
+    segments instead of a geodesic computation.
+    """
+    starts, ends = path_segments(np.array([len(coords)]))
+    return float(segment_distances(coords, starts, ends, lon, lat).min())
+
+
+def path_segments(counts: np.ndarray) -> tuple:
+    """
+    Returns the indices of the first and last coordinate of every segment of consecutive paths, stored one after
+    the other in a single coordinate array, given the number of coordinates of each path.  A path with a single
+    coordinate gets one zero-length segment, so that every path has at least one.
+    """
+    counts = np.asarray(counts, dtype=np.intp)
+    n_segments = np.maximum(counts - 1, 1)
+    # index of the first coordinate of each path, repeated for each of its segments, plus the segment's position
+    first = np.repeat(np.cumsum(counts) - counts, n_segments)
+    position = np.arange(n_segments.sum()) - np.repeat(np.cumsum(n_segments) - n_segments, n_segments)
+    starts = first + position
+    return starts, np.where(np.repeat(counts, n_segments) > 1, starts + 1, starts)
+
+
+def segment_distances(
+    coords: np.ndarray, starts: np.ndarray, ends: np.ndarray, lon: float, lat: float
+) -> np.ndarray:
+    """
+    Returns the distances in meters from lon/lat to the segments from coords[starts] to coords[ends], measured
+    in the plane tangent to the ellipsoid at lon/lat as described in distance_to_path()
+    """
+    m_lon, m_lat = meters_per_degree(lat)
+    scale = np.array((m_lon, m_lat))
+    a = (coords[starts] - (lon, lat)) * scale
+    ab = (coords[ends] - (lon, lat)) * scale - a
+    len2 = np.einsum("ij,ij->i", ab, ab)
+    # position of the point nearest to the origin along each segment, as a fraction of the segment
+    t = np.clip(-np.einsum("ij,ij->i", a, ab) / np.where(len2 > 0.0, len2, 1.0), 0.0, 1.0)
+    nearest = a + t[:, None] * ab
+    return np.sqrt(np.einsum("ij,ij->i", nearest, nearest))
+
+
+def segment_lengths(coords: np.ndarray) -> np.ndarray:
+    """Returns the geodesic length in meters of each segment of the path of lon/lat pairs in `coords`"""
+    lons = coords[:, 0]
+    lats = coords[:, 1]
+    _, _, lengths = _GEOD.inv(lons[:-1], lats[:-1], lons[1:], lats[1:])
+    return lengths
+
+
+def interpolate(
+    coords: np.ndarray, distance: float, lengths: Optional[np.ndarray] = None
+) -> GeoCoordinates:
+    """
+    Go `distance` meters along the path of lon/lat pairs in `coords` and return the resulting point.  When the
+    path is too short, returns its last coordinate.
+
+    Args:
+        coords: (N, 2) array of lon/lat pairs
+        distance: distance in meters from the first coordinate
+        lengths: the path's segment_lengths(), if the caller has already computed them
+
+    Returns:
+        the interpolated point
+    """
+    if len(coords) < 2:
+        return GeoCoordinates(float(coords[-1][0]), float(coords[-1][1]))
+    if lengths is None:
+        lengths = segment_lengths(coords)
+    # the segment containing the point is the first one whose end lies beyond `distance`
+    ends = np.cumsum(lengths)
+    i = int(np.searchsorted(ends, distance, side="right"))
+    if i == len(ends):
+        return GeoCoordinates(float(coords[-1][0]), float(coords[-1][1]))
+    lon, lat = _point_at(coords, ends, i, distance)
+    return GeoCoordinates(float(lon), float(lat))
+
+
+def _point_at(coords: np.ndarray, ends: np.ndarray, i: int, distance: float) -> tuple:
+    """Returns the point `distance` meters into the path, which lies on segment i ending `ends[i]` meters in"""
+    lon1, lat1 = coords[i]
+    remaining = distance - (ends[i - 1] if i > 0 else 0.0)
+    if remaining == 0.0:
+        return lon1, lat1
+    lon2, lat2 = coords[i + 1]
+    azimuth, _, _ = _GEOD.inv(lon1, lat1, lon2, lat2)
+    lon, lat, _ = _GEOD.fwd(lon1, lat1, azimuth, remaining)
+    return lon, lat
+
+
+def substring(coords: np.ndarray, pos_off: float, neg_off: float) -> LineString:
+    """
+    Returns the part of the path of lon/lat pairs in `coords` that starts `pos_off` meters after its first
+    coordinate and ends `neg_off` meters before its last one.  This is the geodesic counterpart of
+    shapely.ops.substring(), which measures in coordinate units.
+
+    If nothing remains of the path, a zero-length LineString is returned: at the last coordinate if `pos_off`
+    reaches beyond the end of the path, otherwise at the start point.
+
+    Args:
+        coords: (N, 2) array of lon/lat pairs
+        pos_off: distance in meters to cut from the start of the path
+        neg_off: distance in meters to cut from the end of the path
+
+    Returns:
+        the remaining part of the path
+    """
+    ends = np.cumsum(segment_lengths(coords))
+    n = len(ends)
+    i = int(np.searchsorted(ends, pos_off, side="right")) if pos_off > 0.0 else 0
+    if i == n:
+        return LineString([coords[-1], coords[-1]])
+    start = _point_at(coords, ends, i, pos_off)
+    if neg_off <= 0.0:
+        return LineString([start, *coords[i + 1:]])
+    end_distance = ends[-1] - neg_off
+    if end_distance <= pos_off:
+        return LineString([start, start])
+    j = int(np.searchsorted(ends, end_distance, side="left"))
+    return LineString([start, *coords[i + 1:j + 1], _point_at(coords, ends, j, end_distance)])
+
+
+def join_coords(lines: Sequence[LineString]) -> np.ndarray:
+    """
+    Returns the (N, 2) coordinate array of the path formed by consecutive connected LineStrings, without
+    repeating the shared coordinate at each joint
+
+    Raises:
+        ValueError: if a line does not start where the previous one ended
+    """
+    coords = shapely.get_coordinates(lines)
+    # index of the first coordinate of every line after the first
+    starts = np.cumsum(shapely.get_num_coordinates(lines))[:-1]
+    if not np.array_equal(coords[starts - 1], coords[starts]):
+        raise ValueError("Lines are not connected")
+    return np.delete(coords, starts, axis=0)
+
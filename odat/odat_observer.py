@@ -1,5 +1,4 @@
-from abc import abstractmethod
-from typing import Sequence, List, Tuple, Dict
+from typing import Sequence, List, Optional, Dict, Tuple
 
 from openlr import LocationReferencePoint
 from openlr_dereferencer import DecoderObserver
@@ -9,11 +8,11 @@ from openlr_dereferencer.decoding.routes import PointOnLine, Route
 from openlr_dereferencer.maps import Line
 
 
-class CandidateCollector(DecoderObserver):
-    def __init__(self):
-        self.candidates: Dict[int, Tuple[LocationReferencePoint, Candidate]] = {}
-
-    """Abstract class representing an observer to the OpenLR decoding process"""
+class NullObserver(DecoderObserver):
+    """
+    Observer to the OpenLR decoding process that ignores every event.  The collectors below derive from it and
+    override only the events they are interested in.
+    """
 
     def on_candidate_found(self, lrp: LocationReferencePoint, candidate: Candidate):
         """Called by the decoder when it finds a candidate for a location reference point"""
@@ -106,8 +105,7 @@ class CandidateCollector(DecoderObserver):
         to_candidate: Candidate,
     ):
         """Called when a route is found from an LRP to the end of the location"""
-        self.candidates[from_index] = (from_lrp, from_candidate)
-        self.candidates[from_index+1] = (to_lrp, to_candidate)
+        pass
 
     def on_route_fail(
         self,
@@ -134,9 +132,76 @@ class CandidateCollector(DecoderObserver):
         The only way of recovering is to go back and discard the last bit of
         the dereferenced line location, if possible."""
         pass
-class ScoreCollector(DecoderObserver):
+
+
+class CandidateCollector(NullObserver):
+    """
+    Collects the LRP and candidate chosen by the decoder for each LRP index of the location, as parallel lists
+    indexed by LRP index
+    """
+
     def __init__(self):
+        self.lrps: List[Optional[LocationReferencePoint]] = []
+        self.candidates: List[Optional[Candidate]] = []
+        self.line_ids: List[Optional[str]] = []
+        # score components (geo, fow, frc, bearing, total) reported for each (lrp, line_id) the decoder scored
+        self.scores: Dict[Tuple[LocationReferencePoint, str], Tuple[float, float, float, float, float]] = {}
+
+    def __len__(self) -> int:
+        return len(self.candidates)
+
+    def _set(self, index: int, lrp: LocationReferencePoint, candidate: Candidate):
+        missing = index + 1 - len(self.candidates)
+        if missing > 0:
+            self.lrps.extend([None] * missing)
+            self.candidates.extend([None] * missing)
+            self.line_ids.extend([None] * missing)
+        self.lrps[index] = lrp
+        self.candidates[index] = candidate
+        self.line_ids[index] = candidate.line.line_id
+
+    def on_candidate_score(
+        self,
+        lrp: LocationReferencePoint,
+        candidate: PointOnLine,
+        geo_score: float,
+        fow_score: float,
+        frc_score: float,
+        bear_score: float,
+        total_score: float,
+    ):
+        """
+        Called by the decoder when a candidate for a location reference point is scored
+        """
+        self.scores[(lrp, candidate.line.line_id)] = (
+            geo_score,
+            fow_score,
+            frc_score,
+            bear_score,
+            total_score,
+        )
 
+    def on_location_end_reached(
+        self,
+        from_lrp: LocationReferencePoint,
+        from_index: int,
+        from_candidate: Candidate,
+        to_lrp: LocationReferencePoint,
+        to_candidate: Candidate,
+    ):
+        """Called when a route is found from an LRP to the end of the location"""
+        self._set(from_index, from_lrp, from_candidate)
+        self._set(from_index + 1, to_lrp, to_candidate)
+
+
+class ScoreCollector(NullObserver):
+    """Collects the score components and rejection reasons reported for a candidate"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """Forget everything collected so far, so that this collector can observe another candidate"""
         self.geo_score = 0.0
         self.fow_score = 0.0
         self.frc_score = 0.0
@@ -147,13 +212,6 @@ class ScoreCollector(DecoderObserver):
         self.bear_reject: bool = False
         self.score_reject = False
 
-
-    """Abstract class representing an observer to the OpenLR decoding process"""
-
-    def on_candidate_found(self, lrp: LocationReferencePoint, candidate: Candidate):
-        """Called by the decoder when it finds a candidate for a location reference point"""
-        pass
-
     def on_candidate_rejected(
             self, lrp: LocationReferencePoint, candidate: Candidate, reason: str
     ):
@@ -192,7 +250,6 @@ class ScoreCollector(DecoderObserver):
         self.bear_score = bear_score
         self.total_score = total_score
 
-
     def on_candidate_rejected_frc(
             self, lrp: LocationReferencePoint, candidate: Candidate, tolerated_frc: int
     ):
@@ -200,76 +257,3 @@ class ScoreCollector(DecoderObserver):
         Called by the decoder when a candidate for a location reference point is rejected due to incompatible FRC
         """
         self.frc_reject = True
-
-    def on_no_candidates_found(self, lrp: LocationReferencePoint):
-        """Called by the decoder when it finds no candidates for a location reference point"""
-        pass
-
-    def on_candidates_found(
-            self, lrp: LocationReferencePoint, candidates: List[Candidate]
-    ):
-        """Called by the decoder when it finds no candidates for a location reference point"""
-        pass
-
-    def on_route_fail_length(
-            self,
-            from_lrp: LocationReferencePoint,
-            to_lrp: LocationReferencePoint,
-            from_candidate: Candidate,
-            to_candidate: Candidate,
-            route: Route,
-            actual_length,
-            min_length: float,
-            max_len_float,
-    ):
-        """Called by the decoder when it finds no candidates for a location reference point"""
-        pass
-
-    def on_route_success(
-            self,
-            from_lrp: LocationReferencePoint,
-            to_lrp: LocationReferencePoint,
-            from_candidate: Candidate,
-            to_candidate: Candidate,
-            path: Sequence[Line],
-    ):
-        """Called after the decoder successfully finds a route between two candidate
-        lines for successive location reference points"""
-        pass
-
-    def on_location_end_reached(
-            self,
-            from_lrp: LocationReferencePoint,
-            from_index: int,
-            from_candidate: Candidate,
-            to_lrp: LocationReferencePoint,
-            to_candidate: Candidate,
-    ):
-        """Called when a route is found from an LRP to the end of the location"""
-        pass
-
-    def on_route_fail(
-            self,
-            from_lrp: LocationReferencePoint,
-            to_lrp: LocationReferencePoint,
-            from_candidate: Candidate,
-            to_candidate: Candidate,
-            reason: str,
-    ):
-        """Called after the decoder fails to find a route between two candidate
-        lines for successive location reference points"""
-        pass
-
-    def on_matching_fail(
-            self,
-            from_lrp: LocationReferencePoint,
-            to_lrp: LocationReferencePoint,
-            from_candidates: Sequence[Candidate],
-            to_candidates: Sequence[Candidate],
-            reason: str,
-    ):
-        """Called after none of the candidate pairs for two LRPs were matching.
-
-        The only way of recovering is to go back and discard the last bit of
-        the dereferenced line location, if possible."""
-        pass
@@ -1,12 +1,17 @@
 from pathlib import Path
 
-from pydantic import BaseModel, Field, FilePath, field_validator
+from pydantic import Field, FilePath, field_validator
+from pydantic.dataclasses import dataclass
 
 """
-This class holds the pydantic sanitized and validated CLI options controlling the ODAT analysis process.
+This class holds the pydantic sanitized and validated CLI options controlling the ODAT analysis process.  Values
+are coerced to their declared types once, at construction.  The class is a frozen, slotted dataclass, so it is
+cheap to pickle when it is handed to worker processes.
 """
 
-class Options(BaseModel):
+
+@dataclass(slots=True, frozen=True)
+class Options:
     db: FilePath
     input: FilePath
     lines_table: str
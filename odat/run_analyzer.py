@@ -1,20 +1,25 @@
-import json
 import logging
+import os
 import sqlite3
+import sys
+import tempfile
+import threading
 from multiprocessing import Queue
+import queue
+import struct
 from time import perf_counter_ns
-from typing import Dict, Set, Tuple, Optional
+from typing import Dict, Iterable, List, Optional, Set, Tuple, TYPE_CHECKING
 import time
 
-from functools import reduce
+from array import array
+from collections import defaultdict
+from functools import lru_cache
 
-from rich.columns import Columns
-from rich.console import Console
-from rich.panel import Panel
-from rich.table import Table
-from shapely import wkb, LineString, Polygon
-from webtool.geotools.geotool_3857 import GeoTool_3857
-from webtool.geotools.geotool_4326 import GeoTool_4326
+import ijson
+import orjson
+import shapely
+
+from shapely import LineString, Polygon, wkb
 from webtool.map_databases.tomtom_sqlite import TomTomMapReaderSQLite
 
 from odat.analysis_result import AnalysisResult
@@ -25,10 +30,48 @@ import multiprocessing as mp
 
 from .options import Options
 
+if TYPE_CHECKING:
+    from rich.console import Console
+    from rich.table import Table
+
 POISON_PILL_MSG = "__DONE__"
 
+# Created on first use by get_console() and shared by every subsequent report
+_console: Optional["Console"] = None
+
+# Number of input records shipped to a worker in a single queue message
+CHUNK_SIZE = 64
+
+# Names of the AnalysisResult members, looked up once per result instead of going through the enum's name property
+_RES_NAME: Dict[AnalysisResult, str] = {m: m.name for m in AnalysisResult}
+
+# Number of chunks per worker that may wait on each queue before the process filling it blocks
+QUEUED_CHUNKS_PER_WORKER = 4
+
+# Number of bytes of output records collected before they are written to the output file
+OUTPUT_BUFFER_SIZE = 64 * 1024
+
+# Tuning applied to every map connection, which ODAT only ever reads from
+CONNECTION_PRAGMAS = (
+    "PRAGMA query_only = 1",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -131072",
+)
+
+# Upper bound of the memory-mapped part of the map DB, which is otherwise mapped whole so that the workers share its
+# pages through the OS page cache
+MMAP_SIZE_LIMIT = 4 << 30
+
+# Header of a map bounds cache file: the size and modification time in ns of the DB the bounds were computed from
+_BOUNDS_CACHE_HEADER = struct.Struct("<qq")
+
+# Number of output blocks that may wait on the writer thread before the collector blocks
+QUEUED_OUTPUT_BLOCKS = 16
+
+
+def build_results_table(results: Iterable[Tuple[str, List]], count: int) -> "Table":
+    from rich.table import Table
 
-def build_results_table(results: Dict[str, Set[Tuple[str, float]]], count: int) -> Table:
     table = Table(title="ODAT analysis summary")
 
     table.add_column("Result", justify="right", style="cyan", no_wrap=True)
@@ -36,26 +79,34 @@ def build_results_table(results: Dict[str, Set[Tuple[str, float]]], count: int)
     table.add_column("% of total", justify="right", style="green")
     table.add_column("% within buffer", justify="right", style="green")
 
-    for k, v in results.items():
-        if len(v) == 0:
-            continue
+    for k, (frac_sum, n) in results:
         table.add_row(
             str(k),
-            str(len(v)),
-            f"{(100.0 * len(v) / count) if count > 0 else 0: .02f}%",
-            f"{(100.0 * (reduce(lambda accum, x: accum + x[1], v, 0.0)) / len(v)) if len(v) > 0 else 0: .02f}%",
+            str(n),
+            f"{(100.0 * n / count) if count > 0 else 0: .02f}%",
+            f"{100.0 * frac_sum / n: .02f}%",
         )
 
     return table
 
 
+_NS = 1e-9
+
+
+def _sec(ns: int) -> str:
+    """Formats a perf_counter_ns() interval in seconds"""
+    return f"{ns * _NS:.04f}"
+
+
 def build_stats_table(
         total_frac: float,
         count: int,
         elapsed: float,
         map_bounds_time: float,
         analysis_time: float,
-) -> Table:
+) -> "Table":
+    from rich.table import Table
+
     table = Table(title="Run statistics")
     table.show_header = False
 
@@ -64,23 +115,34 @@ def build_stats_table(
         "Average % within buffer",
         f"{(100.0 * total_frac / count) if count > 0 else 0:.02f}%",
     )
-    table.add_row(
-        "Map boundary calculation time", f"{map_bounds_time / 1_000_000_000:.04f} secs"
-    )
-    table.add_row("OpenLR analysis time", f"{analysis_time / 1_000_000_000:.04f} secs")
-    table.add_row("Total elapsed time", f"{elapsed / 1_000_000_000:.04f} secs")
+    table.add_row("Map boundary calculation time", f"{_sec(map_bounds_time)} secs")
+    table.add_row("OpenLR analysis time", f"{_sec(analysis_time)} secs")
+    table.add_row("Total elapsed time", f"{_sec(elapsed)} secs")
 
     return table
 
 
+def get_console() -> "Console":
+    global _console
+    if _console is None:
+        from rich.console import Console
+
+        _console = Console()
+    return _console
+
+
 def print_results(
-        results: Dict[str, Set[Tuple[str, float]]],
+        results: Iterable[Tuple[str, List]],
         count: int,
         total_frac: float,
         elapsed: float,
         map_bounds_time: float,
         analysis_time: float,
 ):
+    # rich is only needed for the final report, so workers never import it
+    from rich.columns import Columns
+    from rich.panel import Panel
+
     results_table = build_results_table(results, count)
     stats_table = build_stats_table(
         total_frac, count, elapsed, map_bounds_time, analysis_time
@@ -95,35 +157,73 @@ def print_results(
         padding=(1, 2),
     )
 
-    console = Console()
-    console.print(panel)
+    get_console().print(panel)
+
+
+def new_chunk() -> tuple:
+    """
+    Returns an empty chunk of input records, stored as parallel columns: the OpenLR codes, the binary WKB of the
+    geometries, the categories and the FRCs
+    """
+    return [], [], [], array("i")
 
 
 def load_queue(q, options):
     """
-    This loader process reads a file containing the openlr codes and geometries to be analyzed and places each
-    code on the worker input queue.  At EOF, it inserts WORKER_COUNT "poison pills" into the queue so
-    that each worker receives one and shuts itself down
+    This loader process reads a file containing the openlr codes and geometries to be analyzed and places them
+    on the worker input queue in chunks of CHUNK_SIZE records, so that the per-message queue overhead is paid once
+    per chunk rather than once per record.  A chunk is sent as parallel columns (see new_chunk()), with the
+    geometries as binary WKB, which pickles far more cheaply than a list of tuples of shapely objects; the workers
+    decode the geometries.  The "locations" array is parsed incrementally, so memory use does not grow with the
+    size of the input file and workers can start before the whole file has been read.  At EOF, it inserts
+    WORKER_COUNT "poison pills" into the queue so that each worker receives one and shuts itself down
     """
 
-    with open(options.input) as inj:
-        j = json.loads(inj.read())
-        for loc in j["locations"]:
+    chunk = new_chunk()
+    olrs, geoms, categories, frcs = chunk
+    with open(options.input, "rb") as inj:
+        for loc in ijson.items(inj, "locations.item", use_float=True):
             try:
-                geom1 = loc["geometry"]
-                ls = wkb.loads(geom1, hex=True)
-                assert isinstance(ls, LineString)
+                geom1: bytes = bytes.fromhex(loc["geometry"])
                 olr: str = loc["locationReference"]
                 category: str = loc["category"]
                 frc: int = int(loc["frc"])
-                q.put((olr, ls, category, frc))
             except Exception as e:
-                logging.warning(f"Error loading {loc['locationReference']}: {e}")
-
-        for _ in range(int(options.num_threads)):
+                logging.warning("Error loading %s: %s", loc["locationReference"], e)
+                continue
+            olrs.append(olr)
+            geoms.append(geom1)
+            categories.append(category)
+            frcs.append(frc)
+            if len(olrs) == CHUNK_SIZE:
+                q.put(chunk)
+                chunk = new_chunk()
+                olrs, geoms, categories, frcs = chunk
+
+        if olrs:
+            q.put(chunk)
+
+        for _ in range(options.num_threads):
             q.put(POISON_PILL_MSG)
 
 
+def decode_chunk(chunk: tuple) -> list:
+    """
+    Decodes the WKB geometries of a chunk of input records in a single vectorized call and returns the (code,
+    LineString, category, frc) tuples of the records whose geometry is a valid LineString
+    """
+    olrs, geoms, categories, frcs = chunk
+    decoded = []
+    for olr, ls, category, frc in zip(
+        olrs, shapely.from_wkb(geoms, on_invalid="ignore"), categories, frcs
+    ):
+        if not isinstance(ls, LineString):
+            logging.warning("Error loading %s: geometry is not a valid LineString", olr)
+            continue
+        decoded.append((olr, ls, category, frc))
+    return decoded
+
+
 def setup_logging(verbose: bool):
     logging.basicConfig(
         format="%(asctime)s %(levelname)s %(message)s",
@@ -132,29 +232,47 @@ def setup_logging(verbose: bool):
     )
 
 
+def _geo_tool_4326():
+    from webtool.geotools.geotool_4326 import GeoTool_4326
+
+    return GeoTool_4326()
+
+
+def _geo_tool_3857():
+    from webtool.geotools.geotool_3857 import GeoTool_3857
+
+    return GeoTool_3857()
+
+
+# The supported target CRSs and decoder configurations, by upper-case name: the only list of the names accepted by
+# --target_crs and --decoder_config.  The geo tools are imported only when their CRS is selected.
+_GEO_TOOLS = {"EPSG:4326": _geo_tool_4326, "EPSG:3857": _geo_tool_3857}
+_CONFIGS = {"STRICTCONFIG": StrictConfig, "RELAXEDCONFIG": RelaxedConfig}
+
+
 def get_geo_tool(crs: str):
-    match crs.upper():
-        case "EPSG:4326":
-            return GeoTool_4326()
-        case "EPSG:3857":
-            return GeoTool_3857()
-        case _:
-            raise ValueError(
-                f"Unknown target CRS: {crs}.  Must be one of [EPSG:4326, EPSG:3857]"
-            )
+    """Returns the (shared) geo tool for the given CRS name, which is matched case-insensitively"""
+    return _get_geo_tool(crs.upper())
+
+
+@lru_cache(maxsize=None)
+def _get_geo_tool(crs: str):
+    try:
+        return _GEO_TOOLS[crs]()
+    except KeyError:
+        raise ValueError(
+            f"Unknown target CRS: {crs}.  Must be one of [{', '.join(_GEO_TOOLS)}]"
+        ) from None
 
 
 def get_config(config: str):
-    match config.upper():
-        case "STRICTCONFIG":
-            return StrictConfig
-        case "RELAXEDCONFIG":
-            return RelaxedConfig
-        case _:
-            raise ValueError(
-                f"Unknown decoder configuration: {config}.  Must be one of ["
-                f"StrictConfig, RelaxedConfig]"
-            )
+    """Returns the decoder configuration with the given name, which is matched case-insensitively"""
+    try:
+        return _CONFIGS[config.upper()]
+    except KeyError:
+        raise ValueError(
+            f"Unknown decoder configuration: {config.upper()}.  Must be one of [{', '.join(_CONFIGS)}]"
+        ) from None
 
 
 def get_map_bounds(map_reader: TomTomMapReaderSQLite, concave_ratio: float) -> Optional[Polygon]:
@@ -168,95 +286,226 @@ def get_map_bounds(map_reader: TomTomMapReaderSQLite, concave_ratio: float) -> O
         return map_reader.get_map_bounds(1.0)
 
 
-def worker(
-        id: int, q_in: Queue, q_out: Queue, options, map_bounds: Polygon, config, geo_tool, verbose: bool
-):
+def open_map_reader(options: Options) -> TomTomMapReaderSQLite:
     """
-    Each worker takes a record off the queue and attempts to decode it.  If it successful, it places a tuple
-    containing the code as well as the decoded coordinates on the writer input queue.  If it is unsuccessful,
-    it places a FAILED_DECODING_MSG message on the writer's queue.  WHen it sees a poison pill message, it
-    places a POISON_PILL_MSG message on the writer queue and terminates.
+    Opens the target DB, with the geo tool and decoder configuration resolved from the option strings rather
+    than pickled across from the parent process, and tunes its connection for read-only use
     """
-
-    setup_logging(verbose)
-    error_count = 0
-    olr = ""
-
-    def enqueue(olr: str, category: str, frc: int, res: AnalysisResult, frac: float) -> None:
-        q_out.put((olr, category, frc, str(res).removeprefix("AnalysisResult."), frac))
-
     rdr = TomTomMapReaderSQLite(
         db_filename=options.db,
         mod_spatialite=options.mod_spatialite,
         lines_table=options.lines_table,
         nodes_table=options.nodes_table,
-        geo_tool=geo_tool,
-        config=config,
+        geo_tool=get_geo_tool(options.target_crs),
+        config=get_config(options.decoder_config),
     )
+    connection = rdr.connection
+    for pragma in CONNECTION_PRAGMAS:
+        connection.execute(pragma)
+    (page_count,) = connection.execute("PRAGMA page_count").fetchone()
+    (page_size,) = connection.execute("PRAGMA page_size").fetchone()
+    connection.execute(f"PRAGMA mmap_size = {min(page_count * page_size, MMAP_SIZE_LIMIT)}")
+    return rdr
 
-    dat: Analyzer = Analyzer(
-        map_reader=rdr,
-        buffer_radius=int(options.buffer),
-        lrp_radius=int(options.lrp_radius),
-        map_bounds=map_bounds,
+
+def get_cached_map_bounds(options: Options) -> Optional[Polygon]:
+    """
+    Returns the map bounds of the target DB, computing them with get_map_bounds() only if no up-to-date copy is
+    cached on disk.  The bounds are cached as WKB next to the DB, keyed by the tables and the concave ratio, after
+    a header recording the size and modification time of the DB; a cached copy is used only if both still match
+    exactly.  The DB is only opened to compute the bounds, and is closed again before returning, so that the
+    workers do not inherit the connection.
+    """
+    if options.concave_ratio > 1.0:
+        return None
+    cache_path = (
+        f"{options.db}.odat-bounds-{options.lines_table}-{options.nodes_table}-{options.concave_ratio}.wkb"
     )
+    db_stat = os.stat(options.db)
+    header = _BOUNDS_CACHE_HEADER.pack(db_stat.st_size, db_stat.st_mtime_ns)
+    try:
+        with open(cache_path, "rb") as f:
+            data = f.read()
+        if data.startswith(header):
+            map_bounds = wkb.loads(data[len(header):])
+            logging.debug(f"Loaded map bounds from {cache_path}")
+            return map_bounds
+    except (OSError, shapely.errors.GEOSException):
+        pass
+
+    logging.debug(f"No up-to-date map bounds cached in {cache_path}, calculating them")
+    map_reader = open_map_reader(options)
+    try:
+        map_bounds = get_map_bounds(map_reader, options.concave_ratio)
+    finally:
+        map_reader.connection.close()
+    if map_bounds is not None:
+        # write to a temporary file and rename it, so that a concurrent run never reads a partial file
+        tmp_name = None
+        try:
+            with tempfile.NamedTemporaryFile(dir=os.path.dirname(cache_path), delete=False) as f:
+                tmp_name = f.name
+                f.write(header + wkb.dumps(map_bounds))
+            os.replace(tmp_name, cache_path)
+        except OSError as e:
+            # don't leave the temporary file behind on every run against a read-only or full volume
+            if tmp_name is not None:
+                try:
+                    os.unlink(tmp_name)
+                except OSError:
+                    pass
+            logging.warning(f"Unable to cache map bounds in {cache_path}: {e}")
+    return map_bounds
+
+
+def pin_to_cpu(id: int):
+    """
+    Pins the calling process to one of the CPUs it is allowed to run on, chosen by `id`, so that each worker keeps
+    its caches warm.  Does nothing on platforms without sched_setaffinity(), and leaves the process unpinned if the
+    affinity cannot be changed: pinning is only an optimization.
+    """
+    if hasattr(os, "sched_setaffinity"):
+        try:
+            cpus = sorted(os.sched_getaffinity(0))
+            os.sched_setaffinity(0, {cpus[id % len(cpus)]})
+        except OSError as e:
+            logging.debug(f"Unable to pin worker {id} to a CPU: {e}")
+
 
-    logging.info(f"Worker {id} initialized")
-    msg = q_in.get()
+def worker(
+        id: int, q_in: Queue, q_out: Queue, options, map_bounds: Polygon, verbose: bool
+):
+    """
+    Each worker takes a chunk of records off the queue and analyzes each one.  It places the list of (code,
+    category, frc, result name, fraction within buffer) tuples of the whole chunk on the writer input queue as a
+    single message; a record whose analysis raised an exception is reported as UNKNOWN_ERROR, as is every record
+    of a chunk that could not be processed at all.  When it sees a poison pill message, or fails unexpectedly, it
+    places a POISON_PILL_MSG message on the writer queue and terminates.
+    """
 
-    while msg != POISON_PILL_MSG:
+    setup_logging(verbose)
+    # the level is fixed for the life of the worker, so it is checked once rather than per failed record
+    log = logging.getLogger()
+    log_errors = log.isEnabledFor(logging.ERROR)
+    error_count = 0
+    try:
+        pin_to_cpu(id)
         try:
-            olr, ls, category, frc = msg
-            olr, res, frac = dat.analyze(olr, ls)
-            enqueue(olr, category, frc, res, frac)
-        except Exception as e:
-            logging.error(f"Error during analysis of {olr}: {e}")
-            enqueue(
-                f"{olr} : Error-{e}-{id}-{error_count}",
-                AnalysisResult.UNKNOWN_ERROR,
-                0.0,
+            dat: Optional[Analyzer] = Analyzer(
+                map_reader=open_map_reader(options),
+                buffer_radius=options.buffer,
+                lrp_radius=options.lrp_radius,
+                map_bounds=map_bounds,
             )
-            error_count += 1
+            log.info("Worker %s initialized", id)
+        except Exception as e:
+            # keep draining the queue, so that the loader is never left blocked on it, reporting every record
+            log.error("Worker %s failed to initialize: %s", id, e)
+            dat, init_error = None, e
+
         msg = q_in.get()
-    q_out.put(msg)
-    logging.debug(f"Worker {id} shutting down")
+        while msg != POISON_PILL_MSG:
+            if dat is None:
+                records = undecoded_records(msg)
+                results = [init_error] * len(records)
+            else:
+                records, results = analyze_chunk(dat, msg)
+            # the results of a chunk go back to the collector in a single message
+            out = []
+            for (olr, _, category, frc), result in zip(records, results):
+                if isinstance(result, Exception):
+                    if log_errors:
+                        log.error("Error during analysis of %s: %s", olr, result)
+                    out.append(
+                        (
+                            f"{olr} : Error-{result}-{id}-{error_count}",
+                            category,
+                            frc,
+                            _RES_NAME[AnalysisResult.UNKNOWN_ERROR],
+                            0.0,
+                        )
+                    )
+                    error_count += 1
+                else:
+                    olr, res, frac = result
+                    out.append((olr, category, frc, _RES_NAME[res], frac))
+            q_out.put(out)
+            msg = q_in.get()
+    finally:
+        # the collector counts the poison pills to know when to stop, so one is always sent
+        q_out.put(POISON_PILL_MSG)
+        log.debug("Worker %s shutting down", id)
+
+
+def undecoded_records(chunk: tuple) -> list:
+    """Returns the (code, None, category, frc) tuples of all the records of a chunk, for reporting errors"""
+    olrs, _, categories, frcs = chunk
+    return [(olr, None, category, frc) for olr, category, frc in zip(olrs, categories, frcs)]
+
+
+def analyze_chunk(dat: Analyzer, chunk: tuple) -> tuple:
+    """
+    Decodes and analyzes a chunk of input records, returning the records and their results.  If the chunk as a
+    whole cannot be decoded or analyzed, the exception becomes the result of each of its records.
+    """
+    try:
+        records = decode_chunk(chunk)
+    except Exception as e:
+        records = undecoded_records(chunk)
+        return records, [e] * len(records)
+    try:
+        return records, dat.analyze_batch([(olr, ls) for olr, ls, _, _ in records])
+    except Exception as e:
+        return records, [e] * len(records)
+
+
+def write_blocks(outf, blocks: queue.Queue, errors: List[BaseException]):
+    """Writes the blocks of bytes put on `blocks` to `outf`, until it receives None.
+
+    The first failed write is appended to `errors`; the remaining blocks are then taken off the queue and dropped, so
+    that the collector never blocks on a full queue nobody empties.
+    """
+    for block in iter(blocks.get, None):
+        if errors:
+            continue
+        try:
+            outf.write(block)
+        except BaseException as e:
+            errors.append(e)
 
 
 def run_parallel_analyzer(options: Options):
     start = perf_counter_ns()
 
     setup_logging(options.verbose)
-    geo_tool = get_geo_tool(options.target_crs)
-    config = get_config(options.decoder_config)
+    # fail on unknown names here, before the loader starts and the map is opened, rather than in every worker
+    get_geo_tool(options.target_crs)
+    get_config(options.decoder_config)
 
     workers = []
-    ctx = mp.get_context("spawn")
-    # create the worker and writer queues
-    q_in = ctx.Queue(0)
-    q_out = ctx.Queue(0)
+    # on Linux, the loader and workers are forked, so that they inherit the modules already imported here and the
+    # map bounds instead of re-importing and unpickling them
+    ctx = mp.get_context("fork" if sys.platform.startswith("linux") else "spawn")
+    # create the worker and writer queues, bounded so that a loader that outpaces the workers, or workers that
+    # outpace the writer, block instead of piling chunks up in memory
+    queue_size = QUEUED_CHUNKS_PER_WORKER * options.num_threads
+    q_in = ctx.Queue(queue_size)
+    q_out = ctx.Queue(queue_size)
 
     # spawn the loader, passing it the worker queue to fill
     loader = ctx.Process(target=load_queue, args=(q_in, options))
     loader.start()
     active_workers = 0
 
-    rdr = TomTomMapReaderSQLite(
-        db_filename=options.db,
-        mod_spatialite=options.mod_spatialite,
-        lines_table=options.lines_table,
-        nodes_table=options.nodes_table,
-        geo_tool=geo_tool,
-        config=config,
-    )
     map_bounds_start = perf_counter_ns()
-    map_bounds: Optional[Polygon] = get_map_bounds(rdr, float(options.concave_ratio))
+    map_bounds: Optional[Polygon] = get_cached_map_bounds(options)
     map_bounds_time = perf_counter_ns() - map_bounds_start
 
     # spawn the workers
-    for i in range(int(options.num_threads)):
+    for i in range(options.num_threads):
         p = ctx.Process(
             target=worker,
-            args=(i, q_in, q_out, options, map_bounds, config, geo_tool, options.verbose),
+            args=(i, q_in, q_out, options, map_bounds, options.verbose),
         )
         p.start()
         workers.append(p)
@@ -264,9 +513,12 @@ def run_parallel_analyzer(options: Options):
 
     count: int = 0
     total_frac: float = 0.0
-    results: Dict[str, Set[Tuple[str, float]]] = {
-        str(k).removeprefix("AnalysisResult."): set() for k in list(AnalysisResult)
-    }
+    # maps each result name to the running [sum, count] of the fractions within the buffer of the OpenLR codes with
+    # that result
+    results: Dict[str, List] = defaultdict(lambda: [0.0, 0])
+    # every code already counted, whatever its result: a code seen again is a duplicate
+    seen: Set[str] = set()
+    duplicates = results["DUPLICATE_OPENLR_CODE"]
 
     analysis_start = perf_counter_ns()
     output_filename = time.strftime("%Y%m%d-%H%M%S")
@@ -285,44 +537,65 @@ def run_parallel_analyzer(options: Options):
         "nodes_table": options.nodes_table,
         "num_threads": options.num_threads,
     }
-    metadata = json.dumps(metadict)
-    first = True
-
-    with open(f"{options.output_dir}/{output_filename}.json", "wt") as outf:
-        outf.write(f"""{{"metadata":{metadata}, "locations":[""")
+    metadata = orjson.dumps(metadict)
+
+    with open(f"{options.output_dir}/{output_filename}.json", "wb") as outf:
+        outf.write(b'{"metadata":' + metadata + b', "locations":[')
+
+        # records are staged here and handed to the writer thread once OUTPUT_BUFFER_SIZE bytes have accumulated,
+        # so that the file I/O overlaps with waiting for the workers
+        buf = bytearray()
+        blocks: queue.Queue = queue.Queue(QUEUED_OUTPUT_BLOCKS)
+        # the writer thread's exception, if any, re-raised once it has been joined
+        write_errors: List[BaseException] = []
+        writer = threading.Thread(target=write_blocks, args=(outf, blocks, write_errors), daemon=True)
+        writer.start()
+        # separator written before the next record: nothing before the first one
+        sep = b""
+
+        # local aliases for the names used on every message
+        get = q_out.get
+        write = blocks.put
+        dumps = orjson.dumps
 
         while active_workers > 0:
             try:
-                msg = q_out.get()
+                msg = get()
                 if msg == POISON_PILL_MSG:
                     # Poison pill:  decrement the worker count
                     logging.debug("Worker shutdown detected")
                     active_workers -= 1
                 else:
-                    olr, category, frc, res, frac = msg
-                    rec = json.dumps(
-                        {"locationReference": olr, "category": category, "frc": frc, "result": res, "fraction": frac})
-                    outf.write(f"{'' if first else ','}{rec}")
-                    first = False
-
-                    if (olr, frac) in results[res]:
-                        results["DUPLICATE_OPENLR_CODE"].add(
-                            (f"{olr} : Duplicate-{count}", 0.0)
-                        )
-                    else:
-                        results[res].add((olr, frac))
-                        total_frac += frac
-                        count += 1
+                    for olr, category, frc, res, frac in msg:
+                        buf += sep
+                        buf += dumps(
+                            {"locationReference": olr, "category": category, "frc": frc, "result": res, "fraction": frac})
+                        sep = b","
+
+                        if olr in seen:
+                            duplicates[1] += 1
+                        else:
+                            seen.add(olr)
+                            accum = results[res]
+                            accum[0] += frac
+                            accum[1] += 1
+                            total_frac += frac
+                            count += 1
+                    if len(buf) >= OUTPUT_BUFFER_SIZE:
+                        write(buf)
+                        buf = bytearray()
             except Exception as e:
-                results["UNKNOWN_ERROR"].add(
-                    (f"{olr} : Error-{e}-{count}", 0.0)
-                )
-        outf.write("]}")
+                logging.error(f"Error while collecting results: {e}")
+                results["UNKNOWN_ERROR"][1] += 1
+        write(buf)
+        write(b"]}")
+        write(None)
+        writer.join()
+        if write_errors:
+            raise write_errors[0]
 
     analysis_time = perf_counter_ns() - analysis_start
-    new_r = {
-        k: v
-        for k, v in sorted(results.items(), key=lambda x: len(x[1]), reverse=True)
-    }
+    # the results that occurred, by descending count
+    by_count = sorted(((k, v) for k, v in results.items() if v[1]), key=lambda kv: kv[1][1], reverse=True)
     end = perf_counter_ns()
-    print_results(new_r, count, total_frac, end - start, map_bounds_time, analysis_time)
+    print_results(by_count, count, total_frac, end - start, map_bounds_time, analysis_time)
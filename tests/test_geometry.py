@@ -0,0 +1,152 @@
+import unittest
+
+import numpy as np
+from pyproj import Geod
+from shapely import LineString
+
+from odat.geometry import (
+    distance_to_path,
+    interpolate,
+    join_coords,
+    path_segments,
+    segment_distances,
+    segment_lengths,
+    substring,
+)
+
+GEOD = Geod(ellps="WGS84")
+
+# an L-shaped path in Luxembourg: about 720 m east, then about 1110 m north
+PATH = np.array([(6.10, 49.60), (6.11, 49.60), (6.11, 49.61)])
+
+
+def geodesic_length(coords) -> float:
+    lons, lats = zip(*coords)
+    return GEOD.line_length(lons, lats)
+
+
+class SegmentLengthsTestCase(unittest.TestCase):
+    def test_matches_geod(self):
+        _, _, expected = GEOD.inv(PATH[:-1, 0], PATH[:-1, 1], PATH[1:, 0], PATH[1:, 1])
+        np.testing.assert_allclose(segment_lengths(PATH), expected)
+
+
+class InterpolateTestCase(unittest.TestCase):
+    def test_start(self):
+        p = interpolate(PATH, 0.0)
+        self.assertAlmostEqual(p.lon, 6.10)
+        self.assertAlmostEqual(p.lat, 49.60)
+
+    def test_mid_path(self):
+        first = segment_lengths(PATH)[0]
+        p = interpolate(PATH, first + 100.0)
+        self.assertAlmostEqual(p.lon, 6.11, places=6)
+        _, _, dist = GEOD.inv(6.11, 49.60, p.lon, p.lat)
+        self.assertAlmostEqual(dist, 100.0, places=3)
+
+    def test_vertex(self):
+        p = interpolate(PATH, segment_lengths(PATH)[0])
+        self.assertAlmostEqual(p.lon, 6.11)
+        self.assertAlmostEqual(p.lat, 49.60)
+
+    def test_beyond_end(self):
+        p = interpolate(PATH, segment_lengths(PATH).sum() + 10.0)
+        self.assertEqual((p.lon, p.lat), (6.11, 49.61))
+
+    def test_single_coordinate(self):
+        p = interpolate(PATH[:1], 50.0)
+        self.assertEqual((p.lon, p.lat), (6.10, 49.60))
+
+
+class SubstringTestCase(unittest.TestCase):
+    def test_no_offsets(self):
+        ls = substring(PATH, 0.0, 0.0)
+        np.testing.assert_allclose(ls.coords, PATH)
+
+    def test_offsets(self):
+        total = segment_lengths(PATH).sum()
+        ls = substring(PATH, 100.0, 200.0)
+        self.assertAlmostEqual(geodesic_length(ls.coords), total - 300.0, places=3)
+        # the interior vertex is kept
+        self.assertIn((6.11, 49.60), list(ls.coords))
+        _, _, start_dist = GEOD.inv(6.10, 49.60, *ls.coords[0])
+        _, _, end_dist = GEOD.inv(6.11, 49.61, *ls.coords[-1])
+        self.assertAlmostEqual(start_dist, 100.0, places=3)
+        self.assertAlmostEqual(end_dist, 200.0, places=3)
+
+    def test_within_one_segment(self):
+        ls = substring(PATH, 100.0, segment_lengths(PATH)[1] + 100.0)
+        self.assertEqual(len(ls.coords), 2)
+        self.assertAlmostEqual(geodesic_length(ls.coords), segment_lengths(PATH)[0] - 200.0, places=3)
+
+    def test_start_beyond_end(self):
+        ls = substring(PATH, segment_lengths(PATH).sum() + 10.0, 0.0)
+        self.assertEqual(list(ls.coords), [(6.11, 49.61), (6.11, 49.61)])
+
+    def test_reversed_offsets(self):
+        # the end offset reaches back past the start offset: nothing remains but the start point
+        total = segment_lengths(PATH).sum()
+        ls = substring(PATH, 100.0, total - 50.0)
+        self.assertEqual(len(ls.coords), 2)
+        self.assertEqual(ls.coords[0], ls.coords[1])
+        _, _, start_dist = GEOD.inv(6.10, 49.60, *ls.coords[0])
+        self.assertAlmostEqual(start_dist, 100.0, places=3)
+
+
+class JoinCoordsTestCase(unittest.TestCase):
+    def test_join(self):
+        lines = [LineString(PATH[:2]), LineString(PATH[1:])]
+        np.testing.assert_array_equal(join_coords(lines), PATH)
+
+    def test_single_line(self):
+        np.testing.assert_array_equal(join_coords([LineString(PATH)]), PATH)
+
+    def test_not_connected(self):
+        lines = [LineString(PATH[:2]), LineString([(6.12, 49.60), (6.12, 49.61)])]
+        with self.assertRaises(ValueError):
+            join_coords(lines)
+
+
+class PathSegmentsTestCase(unittest.TestCase):
+    def test_segments(self):
+        # paths of 3, 1 and 2 coordinates: the single coordinate gets a zero-length segment
+        starts, ends = path_segments(np.array([3, 1, 2]))
+        np.testing.assert_array_equal(starts, [0, 1, 3, 4])
+        np.testing.assert_array_equal(ends, [1, 2, 3, 5])
+
+
+class SegmentDistancesTestCase(unittest.TestCase):
+    # points about 30 m from the path, beside a segment and off its far end
+    POINTS = ((6.105, 49.6003), (6.1104, 49.605), (6.1103, 49.6103))
+
+    @staticmethod
+    def geod_distance(coords, lon, lat) -> float:
+        """Distance from lon/lat to the polyline, by sampling it every meter along the geodesic"""
+        best = np.inf
+        for (lon1, lat1), (lon2, lat2) in zip(coords[:-1], coords[1:]):
+            _, _, length = GEOD.inv(lon1, lat1, lon2, lat2)
+            points = GEOD.inv_intermediate(lon1, lat1, lon2, lat2, npts=int(length) + 1, initial_idx=0, terminus_idx=0,
+                                           return_back_azimuth=False)
+            _, _, dists = GEOD.inv(np.full(len(points.lons), lon), np.full(len(points.lats), lat), points.lons,
+                                   points.lats)
+            best = min(best, min(dists))
+        return best
+
+    def test_against_geod(self):
+        starts, ends = path_segments(np.array([len(PATH)]))
+        for lon, lat in self.POINTS:
+            expected = self.geod_distance(PATH, lon, lat)
+            self.assertAlmostEqual(segment_distances(PATH, starts, ends, lon, lat).min(), expected,
+                                   delta=expected * 1e-3 + 0.01)
+            self.assertAlmostEqual(distance_to_path(PATH, lon, lat), expected, delta=expected * 1e-3 + 0.01)
+
+    def test_on_path(self):
+        self.assertAlmostEqual(distance_to_path(PATH, 6.11, 49.60), 0.0)
+
+    def test_single_coordinate(self):
+        _, _, expected = GEOD.inv(6.10, 49.60, 6.1004, 49.6002)
+        self.assertAlmostEqual(distance_to_path(PATH[:1], 6.1004, 49.6002), expected, delta=expected * 1e-3)
+
+
+if __name__ == "__main__":
+    unittest.main()